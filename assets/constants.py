@@ -1,25 +1,57 @@
-from typing import Dict
+from typing import Dict, Tuple, Type
 
 FONT_TYPE = "JetBrains Mono Bold"
 
+BAR_HEIGHT = 32
+
+# qtile's tuple colour form: 0-255 channels and a 0-1 alpha
+RGBA = Tuple[int, int, int, float]
+
+
+def compile_colour(hex_value: str) -> RGBA:
+    """Parse "#rrggbb" or "#rrggbbaa" once, for qtile to use without parsing"""
+    value = hex_value.lstrip("#")
+    if len(value) not in (6, 8):
+        raise ValueError(f"Expected #rrggbb or #rrggbbaa, got {hex_value!r}")
+    alpha = int(value[6:8], 16) / 255 if len(value) == 8 else 1.0
+    return (int(value[0:2], 16), int(value[2:4], 16), int(value[4:6], 16), alpha)
+
 
 class ColourEnum:
-    _colours: Dict[str, str] = {}
+    """A palette: hex strings in the class body, compiled to RGBA on creation
 
-    def __init_subclass__(cls):
-        for name, hex_value in cls.__annotations__.items():
-            if isinstance(hex_value, str) and hex_value.startswith("#"):
-                cls._colours[name] = hex_value
+    Subclasses declared with `theme="name"` are registered in `themes`, and
+    must define the same colour names as the first one.
+    """
 
-    def __getattr__(self, name: str) -> str:
-        if name in self._colours:
-            return self._colours[name]
-        raise AttributeError(
-            f"'{self.__class__.__name__}' object has no attribute '{name}'"
-        )
+    themes: Dict[str, Type["ColourEnum"]] = {}
+    hex_values: Dict[str, str] = {}
 
+    def __init_subclass__(cls, theme: str = "", **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.hex_values = {
+            name: value
+            for name, value in vars(cls).items()
+            if isinstance(value, str) and value.startswith("#")
+        }
+        for name, value in cls.hex_values.items():
+            setattr(cls, name, compile_colour(value))
+        if not theme:
+            return
+        if ColourEnum.themes:
+            expected = set(next(iter(ColourEnum.themes.values())).hex_values)
+            if set(cls.hex_values) != expected:
+                raise ValueError(
+                    f"Theme {theme} differs in colours: {set(cls.hex_values) ^ expected}"
+                )
+        ColourEnum.themes[theme] = cls
 
-class Colours(ColourEnum):
+    @classmethod
+    def colours(cls) -> Dict[str, RGBA]:
+        return {name: getattr(cls, name) for name in cls.hex_values}
+
+
+class Midnight(ColourEnum, theme="midnight"):
     GREY = "#696969"
     GOLD = "#e2c779"
     HIGHLIGHT = "#ff6b8a"
@@ -30,3 +62,38 @@ class Colours(ColourEnum):
     WHITE = "#e1e1e2"
     BLACK = "#000000"
     WARNING = "#f6719b"
+
+
+class Nord(ColourEnum, theme="nord"):
+    GREY = "#4c566a"
+    GOLD = "#ebcb8b"
+    HIGHLIGHT = "#88c0d0"
+    BRIGHT_GREEN = "#a3be8c"
+    BACKGROUND = "#3b4252"
+    BACKGROUND_LIGHT = "#d08770"
+    DARKER_BACKGROUND = "#2e3440"
+    WHITE = "#eceff4"
+    BLACK = "#1d2128"
+    WARNING = "#bf616a"
+
+
+class Gruvbox(ColourEnum, theme="gruvbox"):
+    GREY = "#7c6f64"
+    GOLD = "#fabd2f"
+    HIGHLIGHT = "#fe8019"
+    BRIGHT_GREEN = "#b8bb26"
+    BACKGROUND = "#3c3836"
+    BACKGROUND_LIGHT = "#d65d0e"
+    DARKER_BACKGROUND = "#1d2021"
+    WHITE = "#ebdbb2"
+    BLACK = "#000000"
+    WARNING = "#fb4934"
+
+
+DEFAULT_THEME = "midnight"
+
+# The theme picked at runtime survives config reloads, which re-run this
+# module in its existing namespace
+ACTIVE_THEME: str = globals().get("ACTIVE_THEME", DEFAULT_THEME)
+
+Colours: Type[ColourEnum] = ColourEnum.themes[ACTIVE_THEME]
@@ -1,5 +1,4 @@
 import os
-import subprocess
 
 from libqtile import hook, qtile
 from libqtile.config import Click, Drag, Group, Key, Match, Screen
@@ -9,6 +8,9 @@ from libqtile.layout.xmonad import MonadTall
 from libqtile.lazy import lazy
 from libqtile.log_utils import logger
 
+# Imported first, so the startup timeline covers the modules below
+from utils.profiling import get_timeline
+
 from assets.constants import Colours, FONT_TYPE
 
 from utils.audio import (
@@ -18,9 +20,23 @@ from utils.audio import (
     toggle_mute_audio_input,
 )
 from utils.brightness import decrease_brightness, increase_brightness
+from utils.groups import move_window_and_follow
+from utils.idle import handle_idle_stage
+from utils.images import get_image_cache
+from utils.reload import reload_config_incremental
+from utils.screenshot import (
+    screenshot_all,
+    screenshot_output,
+    screenshot_region,
+    screenshot_window,
+)
+from utils.screens import OutputScreens
+from utils.supervisor import get_supervisor
+from utils.theme import cycle_theme
+from utils.volume import get_volume_backend
 
-from top_bar import top_bar
-from scripts.utils import shift_group, take_screenshot
+from services import SESSION_SERVICES
+from top_bar import make_top_bar
 
 terminal = "alacritty"
 
@@ -30,10 +46,34 @@ alt = "mod1"
 XDG_CONFIG_DIR = os.environ.get("XDG_CONFIG_HOME", "~/.config")
 
 
-@hook.subscribe.startup_once
+# Not startup_once: after `qtile restart` the services from before the
+# restart are still running and are adopted rather than left unsupervised
+@hook.subscribe.startup
 def on_startup():
-    autostart = os.path.expanduser(f"{XDG_CONFIG_DIR}/qtile/scripts/autostart.sh")
-    subprocess.Popen([autostart])
+    with get_timeline().span("session services spawn"):
+        get_supervisor().start(SESSION_SERVICES)
+
+
+@hook.subscribe.user("idle")
+def on_idle(stage: str):
+    handle_idle_stage(stage)
+
+
+@hook.subscribe.shutdown
+def on_shutdown():
+    get_supervisor().stop()
+
+
+@hook.subscribe.startup_complete
+def start_volume_backend():
+    # Logs which backend the volume keys will use
+    get_volume_backend()
+
+
+@hook.subscribe.startup_complete
+def log_image_cache():
+    # QTILE_IMAGE_CACHE=0 gives the uncached figures to compare against
+    logger.info("Bar images: %s", get_image_cache().stats())
 
 
 mouse = [
@@ -94,7 +134,11 @@ keys = [
     ),
     # Key([meta], "b", bluetooth_menu, desc="rofi bluetooth menu"),
     # END ROFI SCRIPTS
-    Key([], "Print", lazy.function(take_screenshot)),
+    Key([meta, "control"], "t", cycle_theme, desc="Switch to the next theme"),
+    Key([], "Print", screenshot_all, desc="Screenshot every output"),
+    Key(["control"], "Print", screenshot_output, desc="Screenshot the focused output"),
+    Key(["shift"], "Print", screenshot_region, desc="Screenshot a selected region"),
+    Key([alt], "Print", screenshot_window, desc="Screenshot the focused window"),
     Key(
         [meta],
         "c",
@@ -110,29 +154,25 @@ keys = [
     Key(
         [alt, "shift"],
         "h",
-        lazy.function(lambda qtile: shift_group(qtile, -1)),
-        lazy.screen.prev_group(),
+        move_window_and_follow(-1),
         desc="Move window to previous group",
     ),
     Key(
         [alt, "shift"],
         "Left",
-        lazy.function(lambda qtile: shift_group(qtile, -1)),
-        lazy.screen.prev_group(),
+        move_window_and_follow(-1),
         desc="Move window to previous group",
     ),
     Key(
         [alt, "shift"],
         "l",
-        lazy.function(lambda qtile: shift_group(qtile, 1)),
-        lazy.screen.next_group(),
+        move_window_and_follow(1),
         desc="Move window to next group",
     ),
     Key(
         [alt, "shift"],
         "Right",
-        lazy.function(lambda qtile: shift_group(qtile, 1)),
-        lazy.screen.next_group(),
+        move_window_and_follow(1),
         desc="Move window to next group",
     ),
     Key([meta], "h", lazy.layout.left(), desc="Move focus to left"),
@@ -178,7 +218,18 @@ keys = [
         lazy.group.next_window(),
         desc="Cycle backwards through windows",
     ),
-    Key([meta, "control"], "r", lazy.reload_config(), desc="Reload the config"),
+    Key(
+        [meta, "control"],
+        "r",
+        reload_config_incremental,
+        desc="Reload the config, keeping unchanged widgets",
+    ),
+    Key(
+        [meta, "control", "shift"],
+        "r",
+        lazy.reload_config(),
+        desc="Reload the whole config",
+    ),
     # Key([], "XF86Keyboard", cycle_keyboard_layout),
     Key([], "XF86Favorites", lazy.spawn("brave")),
     Key([], "XF86Go", lazy.spawn("rfkill unblock bluetooth")),
@@ -247,18 +298,21 @@ widget_defaults = dict(
 extension_defaults = widget_defaults.copy()
 
 
+output_screens = OutputScreens(lambda _: Screen(top=make_top_bar()))
+
+
 def make_screens():
-    return [Screen(top=top_bar)]
+    return output_screens.screens()
 
 
-screens = make_screens()
+with get_timeline().span("make screens"):
+    screens = make_screens()
 
 
-# This hook ensures screens are reconfigured when monitors change
+# Attach and detach bars as monitors come and go, see OutputScreens
 @hook.subscribe.screen_change
 def on_screen_change(event):
-    logger.warning(f"Screen change detected: {event}")
-    lazy.restart()
+    output_screens.reconfigure(qtile)
 
 
 # Drag floating layouts.
@@ -298,7 +352,8 @@ floating_layout = Floating(
 )
 auto_fullscreen = True
 focus_on_window_activation = "smart"
-reconfigure_screens = True
+# Done by on_screen_change, which first prepares a bar for new outputs
+reconfigure_screens = False
 
 # If things like steam games want to auto-minimize themselves when losing
 # focus, should we respect this or not?
@@ -320,3 +375,5 @@ wl_xcursor_size = 24
 # We choose LG3D to maximize irony: it is a 3D non-reparenting WM written in
 # java that happens to be on java's whitelist.
 wmname = "LG3D"
+
+get_timeline().mark("config loaded")
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CONFIG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter per sample, so every import is cold
+LOAD = """
+import json, sys, time
+start = time.perf_counter()
+from libqtile.confreader import Config
+config = Config(sys.argv[1])
+config.load()
+total = (time.perf_counter() - start) * 1000
+from utils.profiling import get_timeline
+print(json.dumps({"total_ms": total, **get_timeline().as_dict()}))
+"""
+
+
+def cold_load(config: str) -> dict:
+    env = dict(os.environ, QTILE_PROFILE="1")
+    result = subprocess.run(
+        [sys.executable, "-c", LOAD, config],
+        cwd=CONFIG_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=False,
+    )
+    if result.returncode:
+        sys.exit(f"Loading {config} failed:\n{result.stderr}")
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def warm_loads(config: str, runs: int) -> list:
+    """Reloads in this process, as Meta+Ctrl+R does"""
+    sys.path.insert(0, CONFIG_DIR)
+    from libqtile.confreader import Config
+
+    loaded = Config(config)
+    loaded.load()
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        loaded.load()
+        times.append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def summary(times: list) -> dict:
+    return {
+        "runs": len(times),
+        "min_ms": min(times),
+        "median_ms": statistics.median(times),
+        "mean_ms": statistics.mean(times),
+        "max_ms": max(times),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading the qtile config")
+    parser.add_argument("--config", default=os.path.join(CONFIG_DIR, "config.py"))
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=10,
+        help="percent slower than the baseline median that fails",
+    )
+    args = parser.parse_args()
+
+    cold = [cold_load(args.config) for _ in range(args.runs)]
+    results = {
+        "cold": summary([run["total_ms"] for run in cold]),
+        "warm": summary(warm_loads(args.config, args.runs)),
+        # Timeline of the median cold run, for spotting what got slower
+        "timeline": sorted(cold, key=lambda run: run["total_ms"])[len(cold) // 2],
+    }
+    for kind in ("cold", "warm"):
+        stats = results[kind]
+        print(
+            f"{kind}: median {stats['median_ms']:.1f} ms "
+            f"(min {stats['min_ms']:.1f}, max {stats['max_ms']:.1f}, "
+            f"{stats['runs']} runs)"
+        )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressed = False
+        for kind in ("cold", "warm"):
+            before = baseline[kind]["median_ms"]
+            after = results[kind]["median_ms"]
+            change = (after - before) / before * 100
+            print(f"{kind}: {change:+.1f}% against the baseline")
+            regressed |= change > args.tolerance
+        sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,47 @@
 #!/usr/bin/env python3
 
+import os
 import subprocess
 import sys
-import re
+import threading
 import time
-from typing import List, Tuple
-
-from utils import notify
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Make the config directory importable when run as a standalone script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.bluez import (  # noqa: E402
+    SNAPSHOT_TTL,
+    BluetoothSnapshot,
+    Controller,
+    Device,
+    DeviceCache,
+    has_jeepney,
+    parse_managed_objects,
+    watch_objects,
+)
+from utils.bluetoothctl import BluetoothctlSession, DiscoveryManager  # noqa: E402
+from utils.notifications import notify  # noqa: E402
 
 DIVIDER = "━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"
 BACK_BUTTON = "Back"
+NOTIFY = {"channel": "bluetooth", "expire_time": 1_200}
+SCAN_TIMEOUT = 30  # seconds a scan started from the menu runs for
+SCAN_REFRESH = 0.5  # seconds between checks for newly discovered devices
 
 
 class BluetoothManager:
     def __init__(self, rofi_args: List[str] = []):
         self.rofi_args = rofi_args or []
+        # One shared view of controller/device state per menu interaction
+        self.snapshot = BluetoothSnapshot(self.run_bluetoothctl, ttl=SNAPSHOT_TTL)
+        self.cache = DeviceCache()
+        # Mutating commands share one bluetoothctl process and its agent
+        self.session = BluetoothctlSession()
+        self.discovery = DiscoveryManager(self.session)
+        # Device rows of the open menu and the MAC each was built from
+        self.rows: Dict[str, str] = {}
+        self._background: List[threading.Thread] = []
 
     def _run_command(self, command: List[str]) -> str:
         """Run generic command and return output"""
@@ -34,28 +61,43 @@ class BluetoothManager:
         except subprocess.CalledProcessError:
             return ""
 
+    def in_background(self, command: str, on_done, **expect):
+        """Run a slow session command without blocking the menu"""
+        self._background.append(self.session.run_async(command, on_done, **expect))
+
+    def changed(self):
+        """Forget state a command may have changed, in memory and on disk"""
+        self.snapshot.invalidate()
+        self.cache.invalidate()
+
+    def finish(self):
+        """Wait for background pair/connect commands, then end the session"""
+        for thread in self._background:
+            thread.join()
+        self.session.close()
+
     def power_on(self) -> bool:
         """Checks if bluetooth controller is powered on"""
-        output = self.run_bluetoothctl("show")
-        return "Powered: yes" in output
+        return self.snapshot.controller.powered
 
     def toggle_power(self):
         """Toggles power state"""
         if self.power_on():
-            self.run_bluetoothctl("power off")
+            self.session.run("power off")
+            self.changed()
             self.show_menu()
         else:
             rfkill_output = self._run_command(["rfkill", "list", "bluetooth"])
             if "blocked: yes" in rfkill_output:
                 subprocess.run(["rfkill", "unblock", "bluetooth"])
                 time.sleep(3)
-            self.run_bluetoothctl("power on")
+            self.session.run("power on")
+            self.changed()
             self.show_menu()
 
     def scan_on(self) -> Tuple[str, bool]:
         """Checks if controller is scanning for new devices"""
-        output = self.run_bluetoothctl("show")
-        if "Discovering: yes" in output:
+        if self.discovery.active or self.snapshot.controller.discovering:
             return "Scan: on", True
         else:
             return "Scan: off", False
@@ -64,24 +106,23 @@ class BluetoothManager:
         """Toggles scanning state"""
         _, is_scanning = self.scan_on()
         if is_scanning:
-            # Kill existing scan processes
-            try:
-                subprocess.run(["pkill", "-f", "bluetoothctl --timeout 5 scan on"])
-            except subprocess.CalledProcessError:
-                pass
-            self.run_bluetoothctl("scan off")
-            notify("Bluetooth", "Scanning stopped")
+            if self.discovery.active:
+                self.discovery.stop()
+            else:
+                self.session.run("scan off")
+            notify("Bluetooth", "Scanning stopped", **NOTIFY)
+            self.changed()
             self.show_menu()
         else:
-            # Start scanning in background
-            subprocess.Popen(["bluetoothctl", "--timeout", "5", "scan", "on"])
-            notify("Bluetooth", "Scanning for devices...")
+            # Results stream into the menu while it is open
+            self.discovery.start(timeout=SCAN_TIMEOUT)
+            notify("Bluetooth", "Scanning for devices...", **NOTIFY)
+            self.changed()
             self.show_menu()
 
     def pairable_on(self) -> Tuple[str, bool]:
         """Checks if controller is able to pair to devices"""
-        output = self.run_bluetoothctl("show")
-        if "Pairable: yes" in output:
+        if self.snapshot.controller.pairable:
             return "Pairable: on", True
         else:
             return "Pairable: off", False
@@ -90,15 +131,15 @@ class BluetoothManager:
         """Toggles pairable state"""
         _, is_pairable = self.pairable_on()
         if is_pairable:
-            self.run_bluetoothctl("pairable off")
+            self.session.run("pairable off")
         else:
-            self.run_bluetoothctl("pairable on")
+            self.session.run("pairable on")
+        self.changed()
         self.show_menu()
 
     def discoverable_on(self) -> Tuple[str, bool]:
         """Checks if controller is discoverable by other devices"""
-        output = self.run_bluetoothctl("show")
-        if "Discoverable: yes" in output:
+        if self.snapshot.controller.discoverable:
             return "Discoverable: on", True
         else:
             return "Discoverable: off", False
@@ -107,28 +148,38 @@ class BluetoothManager:
         """Toggles discoverable state"""
         _, is_discoverable = self.discoverable_on()
         if is_discoverable:
-            self.run_bluetoothctl("discoverable off")
+            self.session.run("discoverable off")
         else:
-            self.run_bluetoothctl("discoverable on")
+            self.session.run("discoverable on")
+        self.changed()
         self.show_menu()
 
     def device_connected(self, mac: str) -> bool:
         """Checks if a device is connected"""
-        device_info = self.run_bluetoothctl(f"info {mac}")
-        return "Connected: yes" in device_info
+        return bool(self.snapshot.device(mac).connected)
 
     def toggle_connection(self, mac: str, device: str):
         """Toggles device connection"""
+        name = " ".join(device.split()[2:])
         if self.device_connected(mac):
-            self.run_bluetoothctl(f"disconnect {mac}")
+            self.session.run(f"disconnect {mac}")
         else:
-            self.run_bluetoothctl(f"connect {mac}")
+            notify("Bluetooth", f"Connecting to {name}...", **NOTIFY)
+            self.in_background(
+                f"connect {mac}",
+                lambda ok: notify(
+                    "Bluetooth",
+                    f"Connected to {name}" if ok else f"Failed to connect to {name}",
+                    urgency="normal" if ok else "critical",
+                    **NOTIFY,
+                ),
+            )
+        self.changed()
         self.device_menu(device)
 
     def device_paired(self, mac: str) -> Tuple[str, bool]:
         """Checks if a device is paired"""
-        device_info = self.run_bluetoothctl(f"info {mac}")
-        if "Paired: yes" in device_info:
+        if self.snapshot.device(mac).paired:
             return "Paired: yes", True
         else:
             return "Paired: no", False
@@ -137,22 +188,28 @@ class BluetoothManager:
         """Toggles device paired state"""
         _, is_paired = self.device_paired(mac)
         if is_paired:
-            self.run_bluetoothctl(f"remove {mac}")
+            self.session.run(f"remove {mac}")
         else:
-            # Use a more robust pairing method
-            try:
-                subprocess.run(["bluetoothctl", "agent", "NoInputNoOutput"], timeout=5)
-                subprocess.run(["bluetoothctl", "default-agent"], timeout=5)
-                subprocess.run(["bluetoothctl", "pair", mac], timeout=30)
-                subprocess.run(["bluetoothctl", "trust", mac], timeout=5)
-            except subprocess.TimeoutExpired:
-                notify("Bluetooth", "Pairing timeout", urgency="critical")
+            name = " ".join(device.split()[2:])
+
+            def paired(ok: bool):
+                # Runs on the pairing thread, the menu stays responsive
+                if ok and self.session.run(f"trust {mac}"):
+                    notify("Bluetooth", f"Paired with {name}", **NOTIFY)
+                elif ok:
+                    notify("Bluetooth", f"Paired with {name}, trust failed", **NOTIFY)
+                else:
+                    notify("Bluetooth", "Pairing failed", urgency="critical", **NOTIFY)
+                self.changed()
+
+            notify("Bluetooth", f"Pairing with {name}...", **NOTIFY)
+            self.in_background(f"pair {mac}", paired)
+        self.changed()
         self.device_menu(device)
 
     def device_trusted(self, mac: str) -> Tuple[str, bool]:
         """Checks if a device is trusted"""
-        device_info = self.run_bluetoothctl(f"info {mac}")
-        if "Trusted: yes" in device_info:
+        if self.snapshot.device(mac).trusted:
             return "Trusted: yes", True
         else:
             return "Trusted: no", False
@@ -161,57 +218,20 @@ class BluetoothManager:
         """Toggles device trust state"""
         _, is_trusted = self.device_trusted(mac)
         if is_trusted:
-            self.run_bluetoothctl(f"untrust {mac}")
+            self.session.run(f"untrust {mac}")
         else:
-            self.run_bluetoothctl(f"trust {mac}")
+            self.session.run(f"trust {mac}")
+        self.changed()
         self.device_menu(device)
 
-    def get_bluetoothctl_version(self) -> float:
-        """Get bluetoothctl version for backwards compatibility"""
-        try:
-            output = self.run_bluetoothctl("version")
-            version_match = re.search(r"(\d+\.\d+)", output)
-            if version_match:
-                return float(version_match.group(1))
-            return 5.65  # Default to newer version if can't parse
-        except Exception:
-            return 5.65
-
     def print_status(self):
         """Prints a short string with the current bluetooth status"""
-        if self.power_on():
-            print("", end="")
-
-            # Check bluetoothctl version for backwards compatibility
-            version = self.get_bluetoothctl_version()
-            if version < 5.65:
-                paired_devices_cmd = "paired-devices"
-            else:
-                paired_devices_cmd = "devices Paired"
-
-            paired_devices_output = self.run_bluetoothctl(paired_devices_cmd)
-            paired_devices = []
-            for line in paired_devices_output.split("\n"):
-                if "Device" in line:
-                    mac = line.split()[1]
-                    paired_devices.append(mac)
-
-            connected_devices = []
-            for device_mac in paired_devices:
-                if self.device_connected(device_mac):
-                    device_info = self.run_bluetoothctl(f"info {device_mac}")
-                    for line in device_info.split("\n"):
-                        if "Alias" in line:
-                            alias = " ".join(line.split()[1:])
-                            connected_devices.append(alias)
-                            break
-
-            if connected_devices:
-                print(" " + ", ".join(connected_devices))
-            else:
-                print()
-        else:
-            print("")
+        controller = self.snapshot.controller
+        devices = [
+            device if device.detailed else self.snapshot.device(device.mac)
+            for device in self.snapshot.devices
+        ]
+        print(status_line(controller, devices))
 
     def rofi_menu(self, options: str, prompt: str) -> str:
         """Display rofi menu and return selected option"""
@@ -222,6 +242,49 @@ class BluetoothManager:
         except subprocess.CalledProcessError:
             return ""
 
+    def rofi_menu_stream(
+        self,
+        entries: List[str],
+        more: Iterator[str],
+        prompt: str,
+        closed: Optional[threading.Event] = None,
+    ) -> str:
+        """Open rofi with `entries` right away, then append rows from `more`
+
+        `closed` is set once rofi exits so `more` can stop waiting for rows.
+        """
+        cmd = (
+            ["rofi", "-dmenu", "-async-pre-read", "0"] + self.rofi_args + ["-p", prompt]
+        )
+        rofi = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+        )
+
+        def feed():
+            try:
+                rofi.stdin.write("".join(f"{entry}\n" for entry in entries))
+                rofi.stdin.flush()
+                for entry in more:
+                    rofi.stdin.write(f"{entry}\n")
+                    rofi.stdin.flush()
+            except OSError:
+                pass  # rofi closed before all rows arrived
+            finally:
+                try:
+                    rofi.stdin.close()
+                except OSError:
+                    pass
+
+        writer = threading.Thread(target=feed, daemon=True)
+        writer.start()
+        chosen = rofi.stdout.read()
+        rofi.wait()
+        if closed is not None:
+            closed.set()
+        # Let the writer finish so the snapshot is complete before it is used
+        writer.join()
+        return chosen.strip()
+
     def device_menu(self, device: str):
         """A submenu for a specific device that allows connecting, pairing, and trusting"""
         # Parse device string: "Device XX:XX:XX:XX:XX:XX Device Name"
@@ -258,52 +321,83 @@ class BluetoothManager:
         elif chosen == trusted:
             self.toggle_trust(mac, device)
         elif chosen == "Remove":
-            self.run_bluetoothctl(f"remove {mac}")
-            notify("Bluetooth", f"Removed {device_name}")
+            self.session.run(f"remove {mac}")
+            self.changed()
+            notify("Bluetooth", f"Removed {device_name}", **NOTIFY)
             self.show_menu()  # Go back to main menu after removal
         elif chosen == BACK_BUTTON:
             self.show_menu()
 
+    def controller_entries(self, controller: Controller) -> List[str]:
+        """Power toggle and controller flags, followed by the device divider"""
+        if not controller.powered:
+            return ["Power: off", "Exit"]
+        scanning = controller.discovering or self.discovery.active
+        return [
+            "Power: on",
+            f"Scan: {'on' if scanning else 'off'}",
+            f"Pairable: {'on' if controller.pairable else 'off'}",
+            f"Discoverable: {'on' if controller.discoverable else 'off'}",
+            "Exit",
+            DIVIDER,
+        ]
+
+    def initial_entries(self) -> List[str]:
+        """Live controller rows, then the last known device rows
+
+        The device list is queried only on a cold cache.
+        """
+        controller = self.snapshot.controller
+        entries = self.controller_entries(controller)
+        self.rows = {}
+        if controller.powered:
+            devices = self.cache.load()
+            if devices is None:
+                devices = self.snapshot.devices
+            entries += [self.add_row(device.mac, device.alias) for device in devices]
+        return entries
+
+    def add_row(self, mac: str, name: str) -> str:
+        """A device's row: its name, with the MAC when another has that name"""
+        row = name if name not in self.rows else f"{name} ({mac})"
+        self.rows[row] = mac
+        return row
+
+    def fresh_entries(self, closed: threading.Event) -> Iterator[str]:
+        """Device rows that the last known state did not have
+
+        While a scan is running, newly discovered devices keep being added
+        until the menu closes.
+        """
+        if not self.snapshot.controller.powered:
+            return
+        devices = self.snapshot.devices
+        self.cache.save(devices)
+        # By MAC: names change and need not be unique
+        seen = set(self.rows.values())
+        for device in devices:
+            if device.mac not in seen:
+                seen.add(device.mac)
+                yield self.add_row(device.mac, device.alias)
+        while self.discovery.active and not closed.is_set():
+            for found in self.discovery.devices():
+                if found.mac not in seen:
+                    seen.add(found.mac)
+                    yield self.add_row(found.mac, found.name)
+            closed.wait(SCAN_REFRESH)
+
     def show_menu(self):
         """Opens a rofi menu with current bluetooth status and options to connect"""
-        if self.power_on():
-            power = "Power: on"
-
-            # Get devices
-            devices_output = self.run_bluetoothctl("devices")
-            devices = []
-            for line in devices_output.split("\n"):
-                if "Device" in line:
-                    # Extract device name (everything after MAC address)
-                    parts = line.split()
-                    if len(parts) >= 3:
-                        device_name = " ".join(parts[2:])
-                        devices.append(device_name)
-
-            # Get controller flags
-            scan, _ = self.scan_on()
-            pairable, _ = self.pairable_on()
-            discoverable, _ = self.discoverable_on()
-
-            # Build options
-            device_list = "\n".join(devices) if devices else ""
-            if device_list:
-                options = f"{power}\n{scan}\n{pairable}\n{discoverable}\nExit\n{DIVIDER}\n{device_list}"
-            else:
-                options = (
-                    f"{DIVIDER}\n{power}\n{scan}\n{pairable}\n{discoverable}\nExit"
-                )
-        else:
-            power = "Power: off"
-            options = f"{power}\nExit"
+        entries = self.initial_entries()
+        closed = threading.Event()
 
-        # Open rofi menu
-        chosen = self.rofi_menu(options, "")
+        # Open rofi menu, device rows are streamed in as they are read
+        chosen = self.rofi_menu_stream(entries, self.fresh_entries(closed), "", closed)
 
         # Match chosen option to command
         if chosen == "" or chosen == DIVIDER:
             print("No option chosen.")
-        elif chosen == power:
+        elif chosen.startswith("Power:"):
             self.toggle_power()
         elif chosen.startswith("Scan:"):
             self.toggle_scan()
@@ -313,13 +407,58 @@ class BluetoothManager:
             self.toggle_pairable()
         elif chosen == "Exit":
             sys.exit(0)
+        elif chosen in self.rows:
+            # The device the row was built from, not a fresh lookup by name
+            self.device_menu(f"Device {self.rows[chosen]} {chosen}")
+
+
+def format_device(device: Device) -> str:
+    """Alias, with the battery level when the device reports one"""
+    if device.battery is not None:
+        return f"{device.alias} {device.battery}%"
+    return device.alias
+
+
+def status_line(controller: Controller, devices: Iterable[Device]) -> str:
+    """Power state and connected devices as one line"""
+    if not controller.powered:
+        return ""
+    connected = [
+        format_device(device)
+        for device in devices
+        if device.paired and device.connected
+    ]
+    if connected:
+        return " " + ", ".join(connected)
+    return ""
+
+
+def watch_status():
+    """Prints a status line every time it changes, until interrupted"""
+    last = None
+    for objects in watch_objects():
+        if objects is None:
+            line = status_line(Controller(), [])
         else:
-            # Check if it's a device
-            devices_output = self.run_bluetoothctl("devices")
-            for line in devices_output.split("\n"):
-                if "Device" in line and chosen in line:
-                    self.device_menu(line)
-                    break
+            controller, devices = parse_managed_objects(objects)
+            line = status_line(controller, devices.values())
+        if line != last:
+            print(line, flush=True)
+            last = line
+
+
+def time_menu(runs: int = 5):
+    """Prints how long the main menu takes to show its first and last rows"""
+    first, full = [], []
+    for _ in range(runs):
+        manager = BluetoothManager()
+        start = time.perf_counter()
+        manager.initial_entries()
+        first.append((time.perf_counter() - start) * 1000)
+        list(manager.fresh_entries(threading.Event()))
+        full.append((time.perf_counter() - start) * 1000)
+    print(f"time-to-menu: min {min(first):.1f} ms, max {max(first):.1f} ms")
+    print(f"time-to-devices: min {min(full):.1f} ms, max {max(full):.1f} ms")
 
 
 def main():
@@ -327,11 +466,23 @@ def main():
     if len(sys.argv) > 1 and sys.argv[1] == "--status":
         bt_manager = BluetoothManager()
         bt_manager.print_status()
+    elif len(sys.argv) > 1 and sys.argv[1] == "--watch":
+        if not has_jeepney:
+            sys.exit("--watch needs jeepney for the BlueZ D-Bus API")
+        try:
+            watch_status()
+        except KeyboardInterrupt:
+            pass
+    elif len(sys.argv) > 1 and sys.argv[1] == "--time-menu":
+        time_menu()
     else:
         # Pass any additional arguments to rofi
         rofi_args = sys.argv[1:] if len(sys.argv) > 1 else []
         bt_manager = BluetoothManager(rofi_args)
-        bt_manager.show_menu()
+        try:
+            bt_manager.show_menu()
+        finally:
+            bt_manager.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+# Make the config directory importable when run as a standalone script
+CONFIG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CONFIG_DIR)
+
+from assets.constants import BAR_HEIGHT  # noqa: E402
+from utils.assets import ASSET_CACHE_DIR, build, find_sources  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-render bar assets at the bar height"
+    )
+    parser.add_argument(
+        "--source",
+        default=os.path.join(CONFIG_DIR, "assets", "graphics"),
+        help="directory of SVG/PNG assets",
+    )
+    parser.add_argument("--cache-dir", default=ASSET_CACHE_DIR)
+    # qtile draws bars in logical pixels and the compositor scales the
+    # buffer, so larger renders for scaled outputs would never be picked
+    parser.add_argument("--height", type=int, default=BAR_HEIGHT, help="bar height")
+    args = parser.parse_args()
+
+    heights = [args.height]
+    start = time.perf_counter()
+    counts = build(find_sources(args.source), heights, args.cache_dir)
+    print(
+        f"{counts['rendered']} rendered, {counts['skipped']} up to date, "
+        f"{counts['failed']} failed at {heights}px "
+        f"in {time.perf_counter() - start:.2f}s -> {args.cache_dir}"
+    )
+    sys.exit(1 if counts["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+import os
+
+from utils.supervisor import Service, bus_name
+
+# Seconds of inactivity before dimming, then locking and suspending
+DIM_TIMEOUT = 120
+LOCK_TIMEOUT = 300
+
+# Idle stages are handled in qtile (utils/idle.py): brightness is restored
+# from memory, playing audio blocks the lock, and suspend follows the lock.
+# They arrive as a user hook, so no widget has to be on the bar.
+IDLE = "qtile cmd-obj -o cmd -f fire_user_hook -a idle"
+
+SESSION_SERVICES = [
+    # Screens: managed by kanshi
+    Service("kanshi", ["kanshi"]),
+    # Wallpapers per monitor, once the outputs are arranged
+    Service(
+        "swaybg",
+        [
+            "swaybg",
+            "-m",
+            "fill",
+            "-i",
+            os.path.expanduser("~/Pictures/background.jpeg"),
+        ],
+        after=["kanshi"],
+    ),
+    # Notification daemon
+    Service("mako", ["mako"], ready=bus_name("org.freedesktop.Notifications")),
+    # Gestures: the daemon itself, which libinput-gestures-setup would detach
+    Service("libinput-gestures", ["libinput-gestures"]),
+    Service(
+        "swayidle",
+        [
+            "swayidle",
+            "-w",
+            "timeout",
+            str(DIM_TIMEOUT),
+            f"{IDLE} dim",
+            "resume",
+            f"{IDLE} resume",
+            "timeout",
+            str(LOCK_TIMEOUT),
+            f"{IDLE} lock",
+            "resume",
+            f"{IDLE} resume",
+        ],
+    ),
+]
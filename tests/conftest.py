@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# Make the config directory importable, as the scripts do
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def private_bus(tmp_path):
+    """Address of a dbus-daemon started for the test, skipped without one"""
+    from dbus_stub import start_private_bus
+
+    bus = start_private_bus(tmp_path)
+    yield bus.address
+    bus.stop()
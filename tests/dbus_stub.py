@@ -0,0 +1,119 @@
+import shutil
+import subprocess
+import tempfile
+import threading
+from typing import Callable, Dict, List, Tuple
+
+import pytest
+
+try:
+    from jeepney import (
+        DBusAddress,
+        HeaderFields,
+        MessageType,
+        new_error,
+        new_method_return,
+        new_signal,
+    )
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+
+    has_jeepney = True
+except ImportError:
+    has_jeepney = False
+
+BUS_CONFIG = """<!DOCTYPE busconfig PUBLIC
+ "-//freedesktop//DTD D-Bus Bus Configuration 1.0//EN"
+ "http://www.freedesktop.org/standards/dbus/1.0/busconfig.dtd">
+<busconfig>
+  <type>session</type>
+  <listen>unix:tmpdir={tmp}</listen>
+  <auth>EXTERNAL</auth>
+  <policy context="default">
+    <allow send_destination="*" eavesdrop="true"/>
+    <allow eavesdrop="true"/>
+    <allow own="*"/>
+  </policy>
+</busconfig>
+"""
+
+# (interface, member) -> handler taking the call's arguments and returning
+# the reply's signature and body
+Handlers = Dict[Tuple[str, str], Callable[..., Tuple[str, tuple]]]
+
+
+class PrivateBus:
+    """A dbus-daemon of its own, so tests never touch the session's bus"""
+
+    def __init__(self, directory: str):
+        # The socket goes in the short system temp dir: tmp_path can exceed
+        # the length limit of a unix socket path
+        config = f"{directory}/bus.conf"
+        with open(config, "w") as f:
+            f.write(BUS_CONFIG.format(tmp=tempfile.gettempdir()))
+        self.proc = subprocess.Popen(
+            ["dbus-daemon", f"--config-file={config}", "--nofork", "--print-address"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        self.address = self.proc.stdout.readline().strip()
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+
+def start_private_bus(directory) -> PrivateBus:
+    if not has_jeepney or shutil.which("dbus-daemon") is None:
+        pytest.skip("needs jeepney and dbus-daemon")
+    return PrivateBus(str(directory))
+
+
+class StubService(threading.Thread):
+    """Owns `name` on the bus and answers method calls with `handlers`
+
+    Every call is recorded in `calls` as (member, arguments). Calls without
+    a handler get an UnknownMethod error.
+    """
+
+    def __init__(self, address: str, name: str, handlers: Handlers):
+        super().__init__(daemon=True)
+        self.handlers = handlers
+        self.calls: List[Tuple[str, tuple]] = []
+        self.conn = open_dbus_connection(bus=address)
+        self.conn.send_and_get_reply(message_bus.RequestName(name), timeout=2)
+        self._send_lock = threading.Lock()
+        self._closing = threading.Event()
+
+    def run(self):
+        while not self._closing.is_set():
+            try:
+                msg = self.conn.receive(timeout=0.05)
+            except TimeoutError:
+                continue
+            if msg.header.message_type != MessageType.method_call:
+                continue
+            fields = msg.header.fields
+            member = fields[HeaderFields.member]
+            self.calls.append((member, msg.body))
+            handler = self.handlers.get((fields.get(HeaderFields.interface), member))
+            if handler is None:
+                reply = new_error(msg, "org.freedesktop.DBus.Error.UnknownMethod")
+            else:
+                reply = new_method_return(msg, *handler(*msg.body))
+            self.send(reply)
+
+    def send(self, msg):
+        with self._send_lock:
+            self.conn.send(msg)
+
+    def emit(self, path: str, interface: str, member: str, signature: str, body):
+        self.send(
+            new_signal(DBusAddress(path, interface=interface), member, signature, body)
+        )
+
+    def stop(self):
+        self._closing.set()
+        self.join()
+        self.conn.close()
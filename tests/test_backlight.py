@@ -0,0 +1,59 @@
+import pytest
+
+from utils.backlight import Backlight
+
+
+def make_device(root, name, kind="raw", max_brightness=1000, brightness=500):
+    device = root / name
+    device.mkdir()
+    (device / "type").write_text(f"{kind}\n")
+    (device / "max_brightness").write_text(f"{max_brightness}\n")
+    (device / "brightness").write_text(f"{brightness}\n")
+    return device
+
+
+def test_prefers_firmware_over_raw_devices(tmp_path):
+    make_device(tmp_path, "amdgpu_bl0", "raw")
+    make_device(tmp_path, "acpi_video0", "firmware")
+    assert Backlight(str(tmp_path)).device == "acpi_video0"
+
+
+def test_falls_back_to_the_first_device(tmp_path):
+    make_device(tmp_path, "b", "unknown")
+    make_device(tmp_path, "a", "unknown")
+    assert Backlight(str(tmp_path)).device == "a"
+
+
+def test_no_device(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        Backlight(str(tmp_path))
+
+
+def test_reads_and_writes_through_sysfs(tmp_path):
+    device = make_device(tmp_path, "intel_backlight", max_brightness=1000)
+    backlight = Backlight(str(tmp_path))
+    assert backlight.max_brightness == 1000
+    assert backlight.get_percent() == 50
+    backlight.set_percent(25)
+    assert (device / "brightness").read_text() == "250"
+    assert backlight.get() == 250
+
+
+def test_changes_are_clamped(tmp_path):
+    device = make_device(tmp_path, "intel_backlight", brightness=950)
+    backlight = Backlight(str(tmp_path))
+    assert backlight.change_percent(10) == 100
+    assert (device / "brightness").read_text() == "1000"
+    assert backlight.change_percent(-150) == 0
+    assert (device / "brightness").read_text() == "0"
+
+
+def test_unwritable_brightness_uses_the_fallback(tmp_path, monkeypatch):
+    device = make_device(tmp_path, "intel_backlight")
+    backlight = Backlight(str(tmp_path))
+    backlight.writable = False
+    calls = []
+    monkeypatch.setattr(backlight, "_set_fallback", calls.append)
+    backlight.set(2000)
+    assert calls == [1000]
+    assert (device / "brightness").read_text() == "500\n"
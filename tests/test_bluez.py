@@ -0,0 +1,223 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import utils.bluez as bluez
+from utils.bluez import Controller, Device, parse_managed_objects, watch_objects
+
+ADAPTER = "org.bluez.Adapter1"
+DEVICE = "org.bluez.Device1"
+BATTERY = "org.bluez.Battery1"
+
+
+def adapter(powered=True, discovering=False):
+    return {
+        ADAPTER: {
+            "Address": ("s", "00:1A:7D:DA:71:13"),
+            "Powered": ("b", powered),
+            "Discovering": ("b", discovering),
+            "Pairable": ("b", True),
+            "Discoverable": ("b", False),
+        },
+        "org.freedesktop.DBus.Properties": {},
+    }
+
+
+def device(mac, adapter="/org/bluez/hci0", battery=None, **props):
+    interfaces = {
+        DEVICE: {
+            "Address": ("s", mac),
+            "Adapter": ("o", adapter),
+            **{
+                name: ("b" if isinstance(v, bool) else "s", v)
+                for name, v in props.items()
+            },
+        }
+    }
+    if battery is not None:
+        interfaces[BATTERY] = {"Percentage": ("y", battery)}
+    return interfaces
+
+
+def path(mac, adapter="/org/bluez/hci0"):
+    return f"{adapter}/dev_{mac.replace(':', '_')}"
+
+
+HEADSET = "AA:BB:CC:DD:EE:01"
+MOUSE = "AA:BB:CC:DD:EE:02"
+OTHER = "AA:BB:CC:DD:EE:03"
+
+OBJECTS = {
+    "/org/bluez": {"org.bluez.AgentManager1": {}},
+    "/org/bluez/hci0": adapter(powered=True, discovering=True),
+    "/org/bluez/hci1": adapter(powered=False),
+    path(HEADSET): device(
+        HEADSET,
+        battery=80,
+        Alias="Headset",
+        Name="WH-1000XM4",
+        Connected=True,
+        Paired=True,
+        Trusted=True,
+    ),
+    path(MOUSE): device(MOUSE, Name="Mouse", Paired=True),
+    path(OTHER, "/org/bluez/hci1"): device(OTHER, adapter="/org/bluez/hci1"),
+}
+
+
+def test_first_adapter_and_its_devices():
+    controller, devices = parse_managed_objects(OBJECTS)
+    assert controller == Controller(
+        powered=True, discovering=True, pairable=True, discoverable=False
+    )
+    assert list(devices) == [HEADSET, MOUSE]
+    assert devices[HEADSET] == Device(
+        HEADSET, "Headset", connected=True, paired=True, trusted=True, battery=80
+    )
+    assert devices[HEADSET].detailed
+
+
+def test_missing_properties_default_to_false_and_name():
+    _, devices = parse_managed_objects(OBJECTS)
+    mouse = devices[MOUSE]
+    assert mouse.alias == "Mouse"
+    assert (mouse.connected, mouse.paired, mouse.trusted) == (False, True, False)
+    assert mouse.battery is None
+
+
+def test_alias_falls_back_to_the_address():
+    _, devices = parse_managed_objects(OBJECTS, "/org/bluez/hci1")
+    assert list(devices) == [OTHER]
+    assert devices[OTHER].alias == OTHER
+
+
+def test_selected_adapter():
+    controller, _ = parse_managed_objects(OBJECTS, "/org/bluez/hci1")
+    assert not controller.powered
+
+
+def test_no_adapter():
+    assert parse_managed_objects({}) == (Controller(), {})
+    assert parse_managed_objects(OBJECTS, "/org/bluez/hci9") == (Controller(), {})
+
+
+class FakeConnection:
+    """Delivers `signals` signals, then drops like a bus that went away"""
+
+    def __init__(self, objects, signals):
+        self.objects = objects
+        self.signals = signals
+        self.fetches = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send_and_get_reply(self, msg, timeout=None):
+        pass
+
+    def receive(self, timeout=None):
+        if self.signals:
+            self.signals -= 1
+            return SimpleNamespace(header=SimpleNamespace(message_type="signal"))
+        if timeout is None:
+            raise ConnectionResetError
+        raise TimeoutError
+
+
+def test_watch_debounces_signals_and_reconnects(monkeypatch):
+    first = FakeConnection({"first": {}}, signals=3)
+    second = FakeConnection({"second": {}}, signals=0)
+    connections = iter([first, second])
+
+    def get_managed_objects(conn):
+        conn.fetches += 1
+        return conn.objects
+
+    monkeypatch.setattr(bluez, "MessageType", SimpleNamespace(signal="signal"))
+    monkeypatch.setattr(bluez, "open_dbus_connection", lambda bus: next(connections))
+    monkeypatch.setattr(bluez, "get_managed_objects", get_managed_objects)
+    monkeypatch.setattr(bluez, "_watch_rules", lambda: [])
+    monkeypatch.setattr(bluez.message_bus, "AddMatch", lambda rule: None)
+
+    watch = watch_objects(reconnect_delay=0)
+    seen = [next(watch) for _ in range(4)]
+    # Three signals in a burst cost one fetch; the dropped bus reads as
+    # "no bluetoothd" until the new connection's first fetch
+    assert seen == [{"first": {}}, {"first": {}}, None, {"second": {}}]
+    assert first.fetches == 2
+
+
+def bluez_service(private_bus):
+    from dbus_stub import StubService
+
+    def get_managed_objects():
+        return "a{oa{sa{sv}}}", (OBJECTS,)
+
+    return StubService(
+        private_bus,
+        "org.bluez",
+        {
+            (
+                "org.freedesktop.DBus.ObjectManager",
+                "GetManagedObjects",
+            ): get_managed_objects
+        },
+    )
+
+
+def properties_changed(service, connected):
+    service.emit(
+        path(HEADSET),
+        "org.freedesktop.DBus.Properties",
+        "PropertiesChanged",
+        "sa{sv}as",
+        (DEVICE, {"Connected": ("b", connected)}, []),
+    )
+
+
+def fetches(service):
+    return sum(member == "GetManagedObjects" for member, _ in service.calls)
+
+
+def test_watch_over_dbus_fetches_once_per_burst(private_bus):
+    service = bluez_service(private_bus)
+    service.start()
+    try:
+        watch = watch_objects(bus=private_bus, quiet=0.1, max_delay=1.0)
+        controller, devices = parse_managed_objects(next(watch))
+        assert controller.powered and list(devices) == [HEADSET, MOUSE]
+
+        for connected in (False, True, False, True, False):
+            properties_changed(service, connected)
+        assert next(watch) is not None
+        assert fetches(service) == 2
+    finally:
+        service.stop()
+
+
+def test_watch_over_dbus_refreshes_during_a_steady_stream(private_bus):
+    service = bluez_service(private_bus)
+    service.start()
+    streaming = threading.Event()
+
+    def stream():
+        # Like RSSI updates during a scan: never quiet for 0.1 s
+        while not streaming.is_set():
+            properties_changed(service, True)
+            time.sleep(0.02)
+
+    try:
+        watch = watch_objects(bus=private_bus, quiet=0.1, max_delay=0.3)
+        next(watch)
+        threading.Thread(target=stream, daemon=True).start()
+        start = time.monotonic()
+        next(watch)
+        assert time.monotonic() - start == pytest.approx(0.3, abs=0.2)
+    finally:
+        streaming.set()
+        service.stop()
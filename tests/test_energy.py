@@ -0,0 +1,26 @@
+from utils.energy import NORMAL, SAVER, EnergyPolicy
+from utils.sampler import POWER_SUPPLY, TickReader
+
+
+def battery_reader(status: str, capacity: int) -> TickReader:
+    reader = TickReader()
+    reader._files[f"{POWER_SUPPLY}/BAT0/uevent"] = (
+        f"POWER_SUPPLY_STATUS={status}\nPOWER_SUPPLY_CAPACITY={capacity}\n"
+    )
+    return reader
+
+
+def test_full_battery_on_discharge_enters_saver_by_default():
+    policy = EnergyPolicy()
+    policy._on_tick(battery_reader("Discharging", 100))
+    assert policy.mode == SAVER
+
+
+def test_threshold_is_inclusive():
+    policy = EnergyPolicy(discharging_below=0.5)
+    policy._on_tick(battery_reader("Discharging", 51))
+    assert policy.mode == NORMAL
+    policy._on_tick(battery_reader("Discharging", 50))
+    assert policy.mode == SAVER
+    policy._on_tick(battery_reader("Charging", 50))
+    assert policy.mode == NORMAL
@@ -0,0 +1,93 @@
+import threading
+
+import utils.idle as idle
+from utils.executor import HandlerExecutor
+from utils.idle import IdleManager
+
+
+class FakeBacklight:
+    max_brightness = 19200
+
+    def __init__(self, value):
+        self.value = value
+        self.percent_calls = []
+
+    def get(self):
+        return self.value
+
+    def set(self, value):
+        self.value = max(0, min(self.max_brightness, value))
+
+    def set_percent(self, percent):
+        self.percent_calls.append(percent)
+        self.set(round(percent / 100 * self.max_brightness))
+
+
+def drain(executor):
+    done = threading.Event()
+    executor.submit("drain", lambda _: done.set())
+    assert done.wait(2)
+
+
+def setup(monkeypatch, value=9600):
+    executor = HandlerExecutor()
+    backlight = FakeBacklight(value)
+    monkeypatch.setattr(idle, "get_executor", lambda: executor)
+    monkeypatch.setattr(idle, "get_backlight", lambda: backlight)
+    return IdleManager(), executor, backlight
+
+
+def block(executor):
+    """Hold the worker so the next jobs stay queued"""
+    release = threading.Event()
+    executor.submit("block", lambda _: release.wait(2))
+    return release
+
+
+def test_dim_then_resume(monkeypatch):
+    manager, executor, backlight = setup(monkeypatch)
+    manager.dim()
+    drain(executor)
+    assert backlight.value == 1920
+    manager.resume()
+    drain(executor)
+    assert backlight.value == 9600
+    assert manager.saved_brightness is None
+
+
+def test_resume_while_dim_is_queued_keeps_the_brightness(monkeypatch):
+    manager, executor, backlight = setup(monkeypatch)
+    release = block(executor)
+    manager.dim()
+    manager.resume()
+    release.set()
+    drain(executor)
+    assert backlight.percent_calls == []
+    assert backlight.value == 9600
+
+
+def test_dim_queued_behind_resume_dims(monkeypatch):
+    manager, executor, backlight = setup(monkeypatch)
+    manager.dim()
+    drain(executor)
+    release = block(executor)
+    manager.resume()
+    manager.dim()
+    release.set()
+    drain(executor)
+    # The panel was already dim: the saved level is still the original one
+    assert backlight.value == 1920
+    assert manager.saved_brightness == 9600
+
+
+def test_idle_hook_runs_the_stage(monkeypatch):
+    manager, executor, backlight = setup(monkeypatch)
+    monkeypatch.setattr(idle, "get_idle_manager", lambda: manager)
+    idle.handle_idle_stage("dim")
+    drain(executor)
+    assert manager.saved_brightness == 9600
+    # Anything else swayidle might be told to send is ignored
+    idle.handle_idle_stage("suspend")
+    idle.handle_idle_stage("resume")
+    drain(executor)
+    assert backlight.value == 9600
@@ -0,0 +1,109 @@
+import time
+
+import utils.notifications as notifications
+from utils.notifications import Notifier
+
+
+class FakeServer:
+    """org.freedesktop.Notifications stand-in: IDs and what was shown"""
+
+    def __init__(self):
+        self.next_id = 1
+        self.calls = []
+
+    def notify(self, title, message, replace_id, urgency, expire_time, app_name):
+        self.calls.append((title, message, replace_id))
+        if replace_id:
+            return replace_id
+        self.next_id += 1
+        return self.next_id - 1
+
+
+def make_notifier(monkeypatch, min_interval=0.0):
+    server = FakeServer()
+    notifier = Notifier(min_interval=min_interval)
+    monkeypatch.setattr(notifications, "has_jeepney", True)
+    monkeypatch.setattr(notifier, "_send_dbus", server.notify)
+    return notifier, server
+
+
+def test_channel_updates_replace_the_previous_notification(monkeypatch):
+    notifier, server = make_notifier(monkeypatch)
+    notifier.notify("Volume", "10%", channel="volume")
+    notifier.notify("Volume", "20%", channel="volume")
+    notifier.notify("Brightness", "50%", channel="brightness")
+    notifier.notify("Brightness", "60%", channel="brightness")
+    assert server.calls == [
+        ("Volume", "10%", 0),
+        ("Volume", "20%", 1),
+        ("Brightness", "50%", 0),
+        ("Brightness", "60%", 2),
+    ]
+    assert notifier.replace_ids == {"volume": 1, "brightness": 2}
+
+
+def test_without_a_channel_notifications_stack(monkeypatch):
+    notifier, server = make_notifier(monkeypatch)
+    notifier.notify("Screenshot", "a.png")
+    notifier.notify("Screenshot", "b.png")
+    assert [replace_id for _, _, replace_id in server.calls] == [0, 0]
+    assert notifier.replace_ids == {}
+
+
+def test_rapid_updates_are_merged_latest_wins(monkeypatch):
+    notifier, server = make_notifier(monkeypatch, min_interval=0.05)
+    for percent in range(10, 60, 10):
+        notifier.notify("Volume", f"{percent}%", channel="volume")
+    time.sleep(0.15)
+    assert server.calls == [("Volume", "10%", 0), ("Volume", "50%", 1)]
+
+
+def test_dbus_failure_falls_back_and_keeps_the_id(monkeypatch):
+    notifier, _ = make_notifier(monkeypatch)
+
+    def broken(*args):
+        raise ConnectionError("no session bus")
+
+    sent = []
+
+    def fallback(title, message, replace_id, *args):
+        sent.append(replace_id)
+        return 7
+
+    monkeypatch.setattr(notifier, "_send_dbus", broken)
+    monkeypatch.setattr(notifier, "_send_fallback", fallback)
+    notifier.notify("Mic", "Muted", channel="mic")
+    notifier.notify("Mic", "Live", channel="mic")
+    assert sent == [0, 7]
+    assert notifier.replace_ids == {"mic": 7}
+
+
+def test_replace_ids_round_trip_over_dbus(private_bus):
+    from dbus_stub import StubService
+
+    ids = iter(range(7, 100))
+
+    def notify(app_name, replace_id, icon, title, body, actions, hints, expire):
+        return "u", (replace_id or next(ids),)
+
+    server = StubService(
+        private_bus,
+        "org.freedesktop.Notifications",
+        {("org.freedesktop.Notifications", "Notify"): notify},
+    )
+    server.start()
+    try:
+        notifier = Notifier(bus=private_bus, min_interval=0)
+        notifier.notify("Volume", "10%", channel="volume", urgency="low")
+        notifier.notify("Volume", "20%", channel="volume", urgency="low")
+        notifier.notify("Screenshot", "a.png", urgency="critical")
+    finally:
+        server.stop()
+
+    sent = [(body[1], body[3], body[4], body[6]) for _, body in server.calls]
+    assert sent == [
+        (0, "Volume", "10%", {"urgency": ("y", 0)}),
+        (7, "Volume", "20%", {"urgency": ("y", 0)}),
+        (0, "Screenshot", "a.png", {"urgency": ("y", 2)}),
+    ]
+    assert notifier.replace_ids == {"volume": 7}
@@ -0,0 +1,136 @@
+import asyncio
+from types import SimpleNamespace
+
+import utils.power_profile as power_profile
+from utils.power_profile import (
+    PowerProfileSource,
+    format_profile,
+    get_power_profile_source,
+)
+
+
+class FakeQtile:
+    """Records call_later instead of scheduling it"""
+
+    def __init__(self):
+        self.later = []
+
+    def call_later(self, delay, func, *args):
+        self.later.append((delay, func, args))
+
+    def call_soon_threadsafe(self, func, *args):
+        func(*args)
+
+    def run_later(self):
+        pending, self.later = self.later, []
+        for _, func, args in pending:
+            func(*args)
+
+
+def no_dbus(monkeypatch):
+    async def add_signal_receiver(*args, **kwargs):
+        return False
+
+    monkeypatch.setattr(power_profile, "add_signal_receiver", add_signal_receiver)
+
+
+def ppd(monkeypatch, reply):
+    """power-profiles-daemon answering Properties.Get with `reply`"""
+    calls = []
+
+    async def add_signal_receiver(*args, **kwargs):
+        return True
+
+    async def send_dbus_message(*args, **kwargs):
+        calls.append(args)
+        return None, reply
+
+    message_type = SimpleNamespace(METHOD_CALL="call", METHOD_RETURN="return")
+    monkeypatch.setattr(power_profile, "MessageType", message_type, raising=False)
+    monkeypatch.setattr(power_profile, "has_dbus", True)
+    monkeypatch.setattr(power_profile, "add_signal_receiver", add_signal_receiver)
+    monkeypatch.setattr(power_profile, "_send_dbus_message", send_dbus_message)
+    return calls
+
+
+def test_format_profile():
+    assert format_profile("low-power") == "Low Power"
+    assert format_profile("balanced") == "Balanced"
+    assert format_profile(None) == "Unknown"
+
+
+def test_plain_file_is_polled_and_listeners_see_changes_once(tmp_path, monkeypatch):
+    no_dbus(monkeypatch)
+    profile = tmp_path / "platform_profile"
+    profile.write_text("balanced\n")
+    source = PowerProfileSource(str(profile), fallback_interval=5)
+    seen = []
+    source.listeners.append(seen.append)
+    qtile = FakeQtile()
+
+    asyncio.run(source.start(qtile))
+    assert source.profile == "balanced"
+    assert [delay for delay, _, _ in qtile.later] == [5]
+
+    qtile.run_later()
+    profile.write_text("performance\n")
+    qtile.run_later()
+    assert seen == ["balanced", "performance"]
+
+
+def test_start_is_idempotent(tmp_path, monkeypatch):
+    no_dbus(monkeypatch)
+    profile = tmp_path / "platform_profile"
+    profile.write_text("balanced\n")
+    source = PowerProfileSource(str(profile))
+    qtile = FakeQtile()
+    asyncio.run(source.start(qtile))
+    asyncio.run(source.start(qtile))
+    assert len(qtile.later) == 1
+
+
+def test_missing_file_reads_as_unknown(tmp_path, monkeypatch):
+    no_dbus(monkeypatch)
+    source = PowerProfileSource(str(tmp_path / "missing"))
+    asyncio.run(source.start(FakeQtile()))
+    assert source.profile is None
+
+
+def test_power_profiles_daemon_signal(tmp_path):
+    source = PowerProfileSource(str(tmp_path / "missing"))
+    seen = []
+    source.listeners.append(seen.append)
+
+    def signal(changed):
+        body = ("net.hadess.PowerProfiles", changed, [])
+        return SimpleNamespace(body=body)
+
+    source._on_ppd_signal(
+        signal({"ActiveProfile": SimpleNamespace(value="power-saver")})
+    )
+    source._on_ppd_signal(signal({"PerformanceDegraded": SimpleNamespace(value="")}))
+    assert seen == ["power-saver"]
+
+
+def test_sources_are_shared_per_path(tmp_path):
+    path = str(tmp_path / "platform_profile")
+    assert get_power_profile_source(path) is get_power_profile_source(path)
+    assert get_power_profile_source(path) is not get_power_profile_source()
+
+
+def test_power_profiles_daemon_is_read_on_start(tmp_path, monkeypatch):
+    body = [SimpleNamespace(value="performance")]
+    calls = ppd(monkeypatch, SimpleNamespace(message_type="return", body=body))
+    source = PowerProfileSource(str(tmp_path / "missing"))
+    qtile = FakeQtile()
+    asyncio.run(source.start(qtile))
+    assert source.profile == "performance"
+    assert calls[0][5:] == ("Get", "ss", ["net.hadess.PowerProfiles", "ActiveProfile"])
+    assert qtile.later == []
+
+
+def test_power_profiles_daemon_read_failure(tmp_path, monkeypatch):
+    ppd(monkeypatch, None)
+    source = PowerProfileSource(str(tmp_path / "missing"))
+    asyncio.run(source.start(FakeQtile()))
+    assert source.profile is None
@@ -0,0 +1,195 @@
+import asyncio
+
+from utils.pulse import (
+    AudioDevice,
+    AudioStateClient,
+    count_playing,
+    format_port,
+    format_volume,
+    parse_devices,
+    parse_server_info,
+)
+
+SINKS = """Sink #0
+\tState: RUNNING
+\tName: alsa_output.pci.analog-stereo
+\tDescription: Built-in Audio Analog Stereo
+\tMute: no
+\tVolume: front-left: 32768 /  50% / -18.06 dB,   front-right: 32768 /  50% / -18.06 dB
+\tActive Port: analog-output-headphones
+Sink #1
+\tName: bluez_output.00_11_22.a2dp
+\tDescription: Headset
+\tMute: yes
+\tVolume: front-left: 65536 / 100% / 0.00 dB
+"""
+
+INFO = """Server String: /run/user/1000/pulse/native
+Default Sink: alsa_output.pci.analog-stereo
+Default Source: alsa_input.pci.analog-stereo
+"""
+
+SINK_INPUTS = """Sink Input #7
+\tCorked: no
+Sink Input #8
+\tCorked: yes
+Sink Input #9
+\tCorked: no
+"""
+
+
+def test_parse_devices():
+    sinks = parse_devices(SINKS)
+    assert list(sinks) == [
+        "alsa_output.pci.analog-stereo",
+        "bluez_output.00_11_22.a2dp",
+    ]
+    builtin = sinks["alsa_output.pci.analog-stereo"]
+    assert builtin.volume == 50
+    assert not builtin.muted
+    assert builtin.active_port == "analog-output-headphones"
+    assert builtin.description == "Built-in Audio Analog Stereo"
+    headset = sinks["bluez_output.00_11_22.a2dp"]
+    assert headset.muted
+    assert headset.volume == 100
+    assert headset.active_port is None
+
+
+def test_parse_server_info():
+    assert parse_server_info(INFO) == {
+        "default_sink": "alsa_output.pci.analog-stereo",
+        "default_source": "alsa_input.pci.analog-stereo",
+    }
+    assert parse_server_info("") == {"default_sink": None, "default_source": None}
+
+
+def test_count_playing():
+    assert count_playing(SINK_INPUTS) == 2
+    assert count_playing("") == 0
+
+
+def test_format_port():
+    assert format_port("analog-output-headphones") == "Headphones"
+    assert format_port(None) == "Audio: Unknown"
+
+
+def test_format_volume():
+    symbols = ["muted", "low", "medium", "high"]
+    assert format_volume(None, symbols) == "muted"
+    assert format_volume(AudioDevice("a", volume=50, muted=True), symbols) == "muted"
+    assert format_volume(AudioDevice("a", volume=30), symbols) == "low"
+    assert format_volume(AudioDevice("a", volume=79), symbols) == "medium"
+    assert format_volume(AudioDevice("a", volume=80), symbols) == "high"
+
+
+def test_handle_event_marks_parts_dirty():
+    client = AudioStateClient()
+    assert client.handle_event("Event 'change' on sink #0\n") == {"sinks"}
+    assert client.handle_event("Event 'new' on sink-input #12\n") == {"streams"}
+    assert client.handle_event("Event 'change' on card #3\n") == {"sinks", "sources"}
+    assert client.handle_event("Event 'change' on client #4\n") == set()
+    assert client.handle_event("garbage") == set()
+    assert client._dirty == {"sinks", "sources", "streams"}
+
+
+class FakeServer:
+    """pactl stand-in: a scripted event stream and slow queries"""
+
+    def __init__(self, lines, delay=0.0, query_time=0.0):
+        self.lines = lines
+        self.delay = delay
+        self.query_time = query_time
+        self.volume = 10
+        self.queries = []
+        self.running = 0
+        self.max_running = 0
+        self.fail = False
+
+    async def events(self):
+        for line in self.lines:
+            await asyncio.sleep(self.delay)
+            self.volume += 10
+            yield line
+        # Keep the stream open, like pactl subscribe
+        await asyncio.Event().wait()
+
+    async def query(self, *args):
+        self.queries.append(args)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        # The state is read when the query starts, like pactl would
+        volume = self.volume
+        try:
+            await asyncio.sleep(self.query_time)
+            if self.fail:
+                raise OSError("pactl went away")
+        finally:
+            self.running -= 1
+        if args == ("info",):
+            return INFO
+        if args == ("list", "sinks"):
+            return SINKS.replace(" 50%", f" {volume}%", 1)
+        return ""
+
+
+def run_client(server, duration, debounce=0.01):
+    async def main():
+        client = AudioStateClient(server.events, server.query, debounce=debounce)
+        seen = []
+        client.add_listener(seen.append)
+        client.start()
+        await asyncio.sleep(duration)
+        client.stop()
+        return client, seen
+
+    return asyncio.run(main())
+
+
+def test_initial_refresh_reads_everything():
+    server = FakeServer([])
+    client, seen = run_client(server, 0.05)
+    assert set(server.queries) == {
+        ("info",),
+        ("list", "sinks"),
+        ("list", "sources"),
+        ("list", "sink-inputs"),
+    }
+    assert client.snapshot.sink.volume == 10
+    assert len(seen) == 1
+
+
+def test_burst_is_debounced_into_one_refresh():
+    server = FakeServer(["Event 'change' on sink #0\n"] * 20)
+    client, _ = run_client(server, 0.1, debounce=0.05)
+    sink_queries = [q for q in server.queries if q == ("list", "sinks")]
+    # The initial read and one for the whole burst
+    assert len(sink_queries) == 2
+    assert client.snapshot.sink.volume == server.volume
+
+
+def test_refreshes_never_overlap_and_end_on_latest_state():
+    # Events keep arriving while each (slow) refresh is running
+    server = FakeServer(
+        ["Event 'change' on sink #0\n"] * 10, delay=0.01, query_time=0.03
+    )
+    client, _ = run_client(server, 0.6, debounce=0.005)
+    assert server.max_running == 1
+    assert client.snapshot.sink.volume == server.volume
+
+
+def test_failed_refresh_is_logged_and_the_next_one_runs(caplog):
+    server = FakeServer(["Event 'change' on sink #0\n"], delay=0.05)
+    server.fail = True
+
+    async def main():
+        client = AudioStateClient(server.events, server.query, debounce=0.01)
+        client.start()
+        await asyncio.sleep(0.02)
+        server.fail = False
+        await asyncio.sleep(0.1)
+        client.stop()
+        return client
+
+    client = asyncio.run(main())
+    assert "Refreshing audio state" in caplog.text
+    assert client.snapshot.sinks
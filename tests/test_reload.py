@@ -0,0 +1,41 @@
+from utils.reload import handover
+
+
+class Service:
+    def __init__(self):
+        self.started = False
+
+    def name(self):
+        return "old"
+
+
+running = Service()
+running.started = True
+
+
+class Service:  # noqa: F811  the class a reload defines again
+    def __init__(self):
+        self.started = False
+        self.restarts = 0
+
+    def name(self):
+        return "new"
+
+
+def test_nothing_kept_builds_a_new_one():
+    assert handover(None, Service) is None
+
+
+def test_running_instance_moves_onto_the_edited_class():
+    kept = handover(running, Service)
+    assert kept is running
+    assert isinstance(kept, Service)
+    assert kept.name() == "new"
+    # Running state stays, attributes the new __init__ adds get defaults
+    assert kept.started is True
+    assert kept.restarts == 0
+
+
+def test_instance_of_the_current_class_is_untouched():
+    service = Service()
+    assert handover(service, Service) is service
@@ -0,0 +1,98 @@
+import os
+import sys
+import threading
+import time
+
+import utils.screenshot as screenshot
+from utils.screenshot import ScreenshotService
+
+PNG = b"\x89PNG\r\n\x1a\nstub"
+
+
+def script(path, body):
+    """An executable Python script, standing in for grim, wl-copy or oxipng"""
+    path.write_text(f"#!{sys.executable}\nimport sys, time\n{body}\n")
+    path.chmod(0o755)
+    return str(path)
+
+
+def stub_service(tmp_path, recompress=()):
+    # What QTILE_SCREENSHOT_CAPTURE points at: grim's arguments in, PNG out
+    capture = script(
+        tmp_path / "grim",
+        f"open({str(tmp_path / 'args')!r}, 'w').write(' '.join(sys.argv[1:]))\n"
+        "time.sleep(0.2)\n"
+        f"sys.stdout.buffer.write({PNG!r})",
+    )
+    clipboard = script(
+        tmp_path / "wl-copy",
+        f"open({str(tmp_path / 'clipboard')!r}, 'wb').write(sys.stdin.buffer.read())",
+    )
+    return ScreenshotService(
+        capture=capture,
+        clipboard=[clipboard],
+        recompress=list(recompress),
+        folder=str(tmp_path / "shots"),
+    )
+
+
+def record_notifications(monkeypatch):
+    sent, done = [], threading.Event()
+
+    def notify(title, body, **kwargs):
+        # What the user can rely on at the moment the notification shows
+        sent.append((title, body, os.path.exists(body) and open(body, "rb").read()))
+        done.set()
+
+    monkeypatch.setattr(screenshot, "notify", notify)
+    return sent, done
+
+
+def test_notification_follows_the_saved_capture(tmp_path, monkeypatch):
+    sent, done = record_notifications(monkeypatch)
+    service = stub_service(tmp_path)
+
+    start = time.perf_counter()
+    service.take()
+    # take() returns at once: the capture runs on its own thread
+    assert time.perf_counter() - start < 0.1
+    assert not done.is_set()
+
+    assert done.wait(5)
+    [(title, path, saved)] = sent
+    assert title == "Screenshot Taken"
+    assert saved == PNG
+    assert service.captures == 1
+
+
+def test_clipboard_gets_the_captured_bytes(tmp_path, monkeypatch):
+    _, done = record_notifications(monkeypatch)
+    service = stub_service(tmp_path)
+    service.take("0,0 1920x1080")
+    assert done.wait(5)
+    # grim wrote to stdout, uncompressed, and the same bytes went to wl-copy
+    assert (tmp_path / "args").read_text() == "-l 0 -g 0,0 1920x1080 -"
+    assert (tmp_path / "clipboard").read_bytes() == PNG
+
+
+def test_recompression_runs_off_the_calling_thread(tmp_path, monkeypatch):
+    sent, _ = record_notifications(monkeypatch)
+    oxipng = script(
+        tmp_path / "oxipng",
+        "time.sleep(0.5)\nopen(sys.argv[-1], 'wb').write(b'small')",
+    )
+    service = stub_service(tmp_path, recompress=[oxipng])
+    path = service._save(PNG)
+
+    start = time.perf_counter()
+    service._done(path)
+    assert time.perf_counter() - start < 0.2
+    assert sent and open(path, "rb").read() == PNG
+
+    worker = service._compressor
+    assert worker.name == "qtile-recompress"
+    assert worker is not threading.current_thread()
+    deadline = time.monotonic() + 5
+    while open(path, "rb").read() != b"small":
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
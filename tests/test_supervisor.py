@@ -0,0 +1,46 @@
+import asyncio
+import signal
+import subprocess
+import sys
+
+from utils.supervisor import AdoptedProcess, Service, Supervisor, find_child
+
+# A child whose command line no other test process shares
+SLEEPER = [sys.executable, "-c", "import time; time.sleep(30)", "supervisor-test"]
+
+
+def test_find_child_matches_the_whole_command():
+    child = subprocess.Popen(SLEEPER)
+    try:
+        assert find_child(SLEEPER) == child.pid
+        assert find_child(SLEEPER[:-1]) is None
+        assert find_child(SLEEPER, parent=child.pid) is None
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_running_service_is_adopted_not_started_again():
+    child = subprocess.Popen(SLEEPER)
+
+    async def run():
+        supervisor = Supervisor()
+        supervisor.start([Service("sleeper", SLEEPER, restart=False)])
+        # A second startup hook, e.g. after a restart, starts nothing twice
+        supervisor.start([Service("sleeper", SLEEPER, restart=False)])
+        await asyncio.sleep(0)
+        proc = supervisor.processes["sleeper"]
+        assert isinstance(proc, AdoptedProcess)
+        assert supervisor.status()["sleeper"]["pid"] == child.pid
+        assert supervisor.status()["sleeper"]["ready"]
+
+        child.terminate()
+        assert await asyncio.wait_for(proc.wait(), 5) == -signal.SIGTERM
+        await asyncio.wait_for(asyncio.gather(*supervisor._tasks), 5)
+        assert not supervisor.status()["sleeper"]["running"]
+
+    try:
+        asyncio.run(run())
+    finally:
+        child.kill()
+        child.wait()
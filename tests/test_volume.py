@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+
+import utils.volume as volume
+from utils.pulse import AudioDevice, AudioSnapshot
+from utils.volume import PulsectlBackend
+
+SINK = "alsa_output.pci.analog-stereo"
+
+
+class FakePulse:
+    """pulsectl.Pulse stand-in counting the lookups of the default sink"""
+
+    connected = True
+
+    def __init__(self, percent=50):
+        self.sink = self.new_sink(percent)
+        self.lookups = 0
+
+    @staticmethod
+    def new_sink(percent, mute=0):
+        return SimpleNamespace(
+            name=SINK, mute=mute, volume=SimpleNamespace(value_flat=percent / 100)
+        )
+
+    def get_sink_by_name(self, name):
+        self.lookups += 1
+        return self.new_sink(round(self.sink.volume.value_flat * 100), self.sink.mute)
+
+    def volume_change_all_chans(self, sink, delta):
+        sink.volume.value_flat += delta
+        self.sink.volume.value_flat = sink.volume.value_flat
+
+    def mute(self, sink, mute):
+        self.sink.mute = mute
+
+
+def make_backend(monkeypatch, running=True):
+    monkeypatch.setattr(
+        volume, "pulsectl", SimpleNamespace(PulseError=Exception), raising=False
+    )
+    client = SimpleNamespace(running=running, add_listener=lambda callback: None)
+    backend = PulsectlBackend()
+    backend.follow(client)
+    backend._pulse = FakePulse()
+    return backend, backend._pulse
+
+
+def snapshot(percent, muted=False):
+    sink = AudioDevice(SINK, volume=percent, muted=muted)
+    return AudioSnapshot(sinks={SINK: sink}, default_sink=SINK)
+
+
+def test_steps_reuse_the_default_sink(monkeypatch):
+    backend, pulse = make_backend(monkeypatch)
+    assert backend.change_volume(5) == (55, False)
+    assert backend.change_volume(5) == (60, False)
+    assert backend.toggle_mute() == (60, True)
+    assert pulse.lookups == 1
+
+
+def test_own_changes_keep_the_cache_others_drop_it(monkeypatch):
+    backend, pulse = make_backend(monkeypatch)
+    backend.change_volume(5)
+    backend._on_audio_change(snapshot(55))
+    backend.change_volume(5)
+    assert pulse.lookups == 1
+
+    # Changed elsewhere, e.g. in pavucontrol
+    pulse.sink.volume.value_flat = 0.2
+    backend._on_audio_change(snapshot(20))
+    assert backend.change_volume(5) == (25, False)
+    assert pulse.lookups == 2
+
+
+def test_no_cache_without_sound_server_events(monkeypatch):
+    backend, pulse = make_backend(monkeypatch, running=False)
+    backend.change_volume(5)
+    assert backend.change_volume(-10) == (45, False)
+    assert pulse.lookups == 2
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import os
+from typing import Callable, Dict, Iterable, List, Optional
+
+from libqtile.log_utils import logger
+
+XDG_CACHE_DIR = os.environ.get("XDG_CACHE_HOME", "~/.cache")
+ASSET_CACHE_DIR = os.path.expanduser(f"{XDG_CACHE_DIR}/qtile/assets")
+MANIFEST = "manifest.json"
+EXTENSIONS = (".svg", ".png")
+
+# Source real path -> {sha256, mtime_ns, size, renders: {height: file name}}
+Manifest = Dict[str, Dict]
+
+
+def load_manifest(cache_dir: str = ASSET_CACHE_DIR) -> Manifest:
+    try:
+        with open(os.path.join(cache_dir, MANIFEST)) as f:
+            return json.load(f)["sources"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+
+def save_manifest(manifest: Manifest, cache_dir: str = ASSET_CACHE_DIR):
+    tmp = os.path.join(cache_dir, f"{MANIFEST}.tmp")
+    with open(tmp, "w") as f:
+        json.dump({"version": 1, "sources": manifest}, f, indent=1, sort_keys=True)
+    os.replace(tmp, os.path.join(cache_dir, MANIFEST))
+
+
+def find_sources(directory: str) -> List[str]:
+    sources = []
+    for root, _, files in os.walk(directory):
+        sources += [os.path.join(root, f) for f in files if f.endswith(EXTENSIONS)]
+    return sorted(os.path.realpath(source) for source in sources)
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def render_png(source: str, height: int, out: str):
+    """Rasterize `source` to a PNG `height` pixels high"""
+    from libqtile.images import Img, get_cairo_surface
+
+    img = Img.from_path(source)
+    img.resize(height=height)
+    surface, _ = get_cairo_surface(img.bytes_img, round(img.width), round(img.height))
+    surface.write_to_png(out)
+
+
+def build(
+    sources: Iterable[str],
+    heights: Iterable[int],
+    cache_dir: str = ASSET_CACHE_DIR,
+    render: Callable[[str, int, str], None] = render_png,
+) -> Dict[str, int]:
+    """Pre-render each source at each height, skipping what is up to date
+
+    Renders are named after the source's content hash and height, so a
+    changed file gets new names and an unchanged one, even if touched or
+    moved, keeps its renders. Renders no longer in the manifest are removed.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    old = load_manifest(cache_dir)
+    manifest: Manifest = {}
+    counts = {"rendered": 0, "skipped": 0, "failed": 0}
+
+    for source in sources:
+        stat = os.stat(source)
+        entry = old.get(source, {})
+        if (entry.get("mtime_ns"), entry.get("size")) != (
+            stat.st_mtime_ns,
+            stat.st_size,
+        ):
+            digest = file_hash(source)
+            if entry.get("sha256") != digest:
+                entry = {"sha256": digest, "renders": {}}
+        entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+
+        renders = {}
+        for height in heights:
+            name = f"{entry['sha256'][:16]}-{height}.png"
+            if os.path.exists(os.path.join(cache_dir, name)):
+                counts["skipped"] += 1
+            else:
+                try:
+                    render(source, height, os.path.join(cache_dir, name))
+                    counts["rendered"] += 1
+                except Exception:
+                    logger.exception("Could not render %s at %dpx", source, height)
+                    counts["failed"] += 1
+                    continue
+            renders[str(height)] = name
+        entry["renders"] = renders
+        manifest[source] = entry
+
+    save_manifest(manifest, cache_dir)
+    keep = {name for entry in manifest.values() for name in entry["renders"].values()}
+    for name in os.listdir(cache_dir):
+        if name.endswith(".png") and name not in keep:
+            os.remove(os.path.join(cache_dir, name))
+    return counts
+
+
+# ─────────────────────────────────────────────
+#  Lookup
+# ─────────────────────────────────────────────
+
+_manifest: Optional[Manifest] = None
+
+
+def prerendered(
+    path: str, height: float, cache_dir: str = ASSET_CACHE_DIR
+) -> Optional[str]:
+    """The smallest up to date render of `path` at least `height` high"""
+    global _manifest
+    if _manifest is None:
+        _manifest = load_manifest(cache_dir)
+    entry = _manifest.get(os.path.realpath(path))
+    if not entry:
+        return None
+    stat = os.stat(path)
+    if (entry["mtime_ns"], entry["size"]) != (stat.st_mtime_ns, stat.st_size):
+        return None
+    heights = sorted(int(h) for h in entry["renders"])
+    fits = [h for h in heights if h >= height] or heights[-1:]
+    if not fits:
+        return None
+    render = os.path.join(cache_dir, entry["renders"][str(fits[0])])
+    return render if os.path.exists(render) else None
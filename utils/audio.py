@@ -1,22 +1,29 @@
+import operator
 import subprocess
-import re
+from typing import Optional
+
 from libqtile.lazy import lazy
+from libqtile.log_utils import logger
 
+from utils.executor import get_executor
+from utils.notifications import notify
+from utils.volume import PactlBackend, VolumeState, get_volume_backend
 
 # ─────────────────────────────────────────────
-#  Helpers
+#  Backend
 # ─────────────────────────────────────────────
 
 
-def notify(title: str, body: str, urgency: str = "normal", replaces_id: str = ""):
-    """Wrapper around notify-send (for mako)"""
-    cmd = ["notify-send", "-u", urgency]
-
-    if replaces_id:
-        cmd.extend(["-r", replaces_id])
-
-    cmd.extend([title, body])
-    subprocess.run(cmd, check=False)
+def call_backend(operation: str, *args):
+    """Run a volume operation, using pactl if the persistent backend fails"""
+    backend = get_volume_backend()
+    try:
+        return getattr(backend, operation)(*args)
+    except Exception:
+        if not backend.persistent:
+            raise
+        logger.exception("Volume backend failed, falling back to pactl")
+        return getattr(PactlBackend(), operation)(*args)
 
 
 # ─────────────────────────────────────────────
@@ -24,92 +31,56 @@ def notify(title: str, body: str, urgency: str = "normal", replaces_id: str = ""
 # ─────────────────────────────────────────────
 
 
-def get_mic_status():
-    """Return True if mic is muted"""
-    try:
-        result = subprocess.run(
-            ["pactl", "get-source-mute", "@DEFAULT_SOURCE@"],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-        return "yes" in result.stdout.lower()
-    except subprocess.CalledProcessError:
-        return True
-
-
 def send_mic_notification(is_muted: bool):
     """Show a mako notification for mic state"""
     if is_muted:
         notify(
             "Microphone",
             "🎤❌ Microphone Muted",
+            channel="mic",
             urgency="normal",
-            replaces_id="2000",
         )
     else:
         notify(
             "Microphone",
             "🎤 Microphone Live",
+            channel="mic",
             urgency="critical",  # red warning when mic is hot
-            replaces_id="2000",
         )
 
 
-@lazy.function
-def toggle_mute_audio_input(qtile):
-    """Toggle microphone mute"""
+def _toggle_mic(toggle: bool) -> Optional[bool]:
     try:
-        subprocess.run(
-            ["pactl", "set-source-mute", "@DEFAULT_SOURCE@", "toggle"], check=True
-        )
-        send_mic_notification(get_mic_status())
-
+        if toggle:
+            return call_backend("toggle_source_mute")
+        return call_backend("get_source_mute")
     except subprocess.CalledProcessError:
-        notify("Microphone Error", "Could not toggle mic", urgency="critical")
-
-
-# ─────────────────────────────────────────────
-#  Volume (Output Audio)
-# ─────────────────────────────────────────────
-
-
-def get_default_sink():
-    try:
-        result = subprocess.run(
-            ["pactl", "get-default-sink"], capture_output=True, text=True, check=True
+        notify(
+            "Microphone Error",
+            "Could not toggle mic",
+            channel="mic",
+            urgency="critical",
         )
-        return result.stdout.strip()
-    except subprocess.CalledProcessError:
         return None
 
 
-def get_volume():
-    """Return (volume %, is_muted)"""
-    sink = get_default_sink()
-    if not sink:
-        return 0, False
+def _show_mic(is_muted: Optional[bool]):
+    if is_muted is not None:
+        send_mic_notification(is_muted)
 
-    try:
-        v = subprocess.run(
-            ["pactl", "get-sink-volume", sink],
-            capture_output=True,
-            text=True,
-            check=True,
-        )
-
-        m = subprocess.run(
-            ["pactl", "get-sink-mute", sink], capture_output=True, text=True, check=True
-        )
 
-        volume_match = re.search(r"/\s*(\d+)%", v.stdout)
-        volume = int(volume_match.group(1)) if volume_match else 0
+@lazy.function
+def toggle_mute_audio_input(qtile):
+    """Toggle microphone mute"""
+    # An even number of queued presses cancels out
+    get_executor().submit(
+        "mic", _toggle_mic, True, merge=operator.xor, on_done=_show_mic
+    )
 
-        muted = "yes" in m.stdout
-        return volume, muted
 
-    except subprocess.CalledProcessError:
-        return 0, False
+# ─────────────────────────────────────────────
+#  Volume (Output Audio)
+# ─────────────────────────────────────────────
 
 
 def send_volume_notification(volume: int, is_muted: bool):
@@ -124,53 +95,63 @@ def send_volume_notification(volume: int, is_muted: bool):
         urgency = "low"
 
     bar_length = 20
-    filled = int(volume / 100 * bar_length)
+    filled = min(int(volume / 100 * bar_length), bar_length)
     bar = "█" * filled + "░" * (bar_length - filled)
 
     notify(
         "Volume",
         f"{icon} {message}\n{bar}",
+        channel="volume",
         urgency=urgency,
-        replaces_id="1000",
     )
 
 
+def _change_volume(step: int) -> Optional[VolumeState]:
+    try:
+        return call_backend("change_volume", step)
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _toggle_mute(toggle: bool) -> Optional[VolumeState]:
+    try:
+        return call_backend("toggle_mute" if toggle else "get_volume")
+    except subprocess.CalledProcessError:
+        return None
+
+
+def _show_volume(state: Optional[VolumeState]):
+    if state is not None:
+        send_volume_notification(*state)
+
+
 # ─────────────────────────────────────────────
 #  Qtile Bindings
 # ─────────────────────────────────────────────
 
 
+def change_volume(step: int):
+    """Queue a relative volume change; repeated presses are summed"""
+    get_executor().submit(
+        "volume", _change_volume, step, merge=operator.add, on_done=_show_volume
+    )
+
+
 @lazy.function
 def raise_volume(qtile):
     """Increase volume"""
-    sink = get_default_sink()
-    if not sink:
-        return
-
-    subprocess.run(["pactl", "set-sink-volume", sink, "+5%"])
-    volume, muted = get_volume()
-    send_volume_notification(volume, muted)
+    change_volume(5)
 
 
 @lazy.function
 def lower_volume(qtile):
     """Decrease volume"""
-    sink = get_default_sink()
-    if not sink:
-        return
-
-    subprocess.run(["pactl", "set-sink-volume", sink, "-5%"])
-    volume, muted = get_volume()
-    send_volume_notification(volume, muted)
+    change_volume(-5)
 
 
 @lazy.function
 def toggle_mute_audio_output(qtile):
     """Mute/unmute speakers"""
-    sink = get_default_sink()
-    if not sink:
-        return
-
-    subprocess.run(["pactl", "set-sink-mute", sink, "toggle"])
-    volume, muted = get_volume()
-    send_volume_notification(volume, muted)
+    get_executor().submit(
+        "mute", _toggle_mute, True, merge=operator.xor, on_done=_show_volume
+    )
@@ -0,0 +1,106 @@
+import os
+import subprocess
+from typing import Optional
+
+from libqtile.log_utils import logger
+
+SYSFS_BACKLIGHT = "/sys/class/backlight"
+
+
+class Backlight:
+    """Reads and writes the panel backlight through sysfs
+
+    The device and its `max_brightness` are looked up once. When the
+    `brightness` file is not writable (no udev rule for the video group),
+    writes go through logind's SetBrightness and finally brightnessctl.
+    """
+
+    def __init__(self, root: str = SYSFS_BACKLIGHT, device: Optional[str] = None):
+        self.root = root
+        self.device = device or self._find_device()
+        self.path = os.path.join(self.root, self.device)
+        with open(os.path.join(self.path, "max_brightness")) as f:
+            self.max_brightness = int(f.read().strip())
+        self.writable = os.access(os.path.join(self.path, "brightness"), os.W_OK)
+
+    def _find_device(self) -> str:
+        devices = sorted(os.listdir(self.root))
+        if not devices:
+            raise FileNotFoundError(f"No backlight device under {self.root}")
+        # Prefer firmware/platform interfaces over raw GPU ones, like brightnessctl
+        for kind in ("firmware", "platform", "raw"):
+            for device in devices:
+                try:
+                    with open(os.path.join(self.root, device, "type")) as f:
+                        if f.read().strip() == kind:
+                            return device
+                except OSError:
+                    continue
+        return devices[0]
+
+    def get(self) -> int:
+        """Raw brightness value"""
+        with open(os.path.join(self.path, "brightness")) as f:
+            return int(f.read().strip())
+
+    def set(self, value: int):
+        """Set the raw brightness value, clamped to the device range"""
+        value = max(0, min(self.max_brightness, value))
+        if self.writable:
+            try:
+                with open(os.path.join(self.path, "brightness"), "w") as f:
+                    f.write(str(value))
+                return
+            except OSError:
+                self.writable = False
+        self._set_fallback(value)
+
+    def _set_fallback(self, value: int):
+        try:
+            subprocess.run(
+                [
+                    "busctl",
+                    "call",
+                    "org.freedesktop.login1",
+                    "/org/freedesktop/login1/session/auto",
+                    "org.freedesktop.login1.Session",
+                    "SetBrightness",
+                    "ssu",
+                    "backlight",
+                    self.device,
+                    str(value),
+                ],
+                capture_output=True,
+                check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            logger.info("logind SetBrightness failed, falling back to brightnessctl")
+            subprocess.run(
+                ["brightnessctl", "--device", self.device, "set", str(value)],
+                capture_output=True,
+                check=True,
+            )
+
+    def get_percent(self) -> int:
+        return round(self.get() / self.max_brightness * 100)
+
+    def set_percent(self, percent: int):
+        self.set(round(percent / 100 * self.max_brightness))
+
+    def change_percent(self, step: int) -> int:
+        """Apply a relative change and return the new percentage"""
+        value = self.get() + round(step / 100 * self.max_brightness)
+        self.set(value)
+        return round(
+            max(0, min(self.max_brightness, value)) / self.max_brightness * 100
+        )
+
+
+_backlight: Optional[Backlight] = globals().get("_backlight")
+
+
+def get_backlight() -> Backlight:
+    global _backlight
+    if _backlight is None:
+        _backlight = Backlight()
+    return _backlight
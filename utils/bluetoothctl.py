@@ -0,0 +1,267 @@
+import re
+import subprocess
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from libqtile.log_utils import logger
+
+# Colours and readline prompt markers bluetoothctl adds to interactive output
+ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]|[\x01\x02\r]")
+
+SUCCESS = r"(?i)succe(ss|eded)|has been removed"
+FAILURE = r"[Ff]ailed|not available|Error"
+
+# What each command prints when it settles, keyed by the command or its
+# first word. The patterns name the command (and the device, where
+# bluetoothctl prints it), so a pair running in the background is not
+# settled by the output of a trust sent meanwhile.
+OUTCOMES: Dict[str, Tuple[str, str]] = {
+    "power": (r"Changing power {arg} succeeded", r"Failed to set power"),
+    "pairable": (r"Changing pairable {arg} succeeded", r"Failed to set pairable"),
+    "discoverable": (
+        r"Changing discoverable {arg} succeeded",
+        r"Failed to set discoverable",
+    ),
+    "scan on": (r"Discovery started|Discovering: yes", r"Failed to start discovery"),
+    "scan off": (r"Discovery stopped|Discovering: no", r"Failed to stop discovery"),
+    "pair": (r"Pairing successful|Device {arg} Paired: yes", r"Failed to pair"),
+    "connect": (
+        r"Connection successful|Device {arg} Connected: yes",
+        r"Failed to connect",
+    ),
+    "disconnect": (
+        r"Successful disconnected|Device {arg} Connected: no",
+        r"Failed to disconnect",
+    ),
+    "trust": (r"Changing {arg} trust succeeded", r"Failed to set trusted"),
+    "untrust": (r"Changing {arg} untrust succeeded", r"Failed to set trusted"),
+    "remove": (r"Device has been removed|\[DEL\] Device {arg}", r"Failed to remove"),
+    "agent": (r"Agent registered|already registered", r"Failed to register agent"),
+    "default-agent": (
+        r"Default agent request successful",
+        r"No agent is registered|Failed to request default agent",
+    ),
+}
+
+
+def outcome(command: str) -> Tuple[str, str]:
+    """Success and failure patterns for one bluetoothctl command"""
+    verb, _, arg = command.partition(" ")
+    patterns = OUTCOMES.get(command) or OUTCOMES.get(verb)
+    if patterns is None:
+        return SUCCESS, FAILURE
+    success, failure = patterns
+    return success.format(arg=re.escape(arg.strip())), failure
+
+
+class BluetoothctlSession:
+    """One interactive bluetoothctl process shared by a whole menu interaction
+
+    Commands are written to its stdin and their outcome is read back from
+    the output stream, so the pairing agent registered at start-up stays
+    alive for every command. `listeners` are called with every cleaned
+    output line, e.g. `[NEW] Device ...` during discovery.
+    """
+
+    def __init__(self, command: Sequence[str] = ("bluetoothctl",)):
+        self.command = list(command)
+        self.proc: Optional[subprocess.Popen] = None
+        self.listeners: List[Callable[[str], None]] = []
+        self._lines: List[str] = []
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+
+    def start(self):
+        if self.proc is not None and self.proc.poll() is None:
+            return
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        threading.Thread(target=self._read, daemon=True).start()
+        self.run("agent NoInputNoOutput")
+        self.run("default-agent")
+
+    def _read(self):
+        for raw in self.proc.stdout:
+            line = ANSI_RE.sub("", raw).strip()
+            if not line:
+                continue
+            with self._cond:
+                self._lines.append(line)
+                self._cond.notify_all()
+            for callback in list(self.listeners):
+                try:
+                    callback(line)
+                except Exception:
+                    logger.exception("bluetoothctl listener failed")
+        with self._cond:
+            self._cond.notify_all()
+
+    def send(self, command: str) -> int:
+        """Write a command, returns the output position it was sent at"""
+        self.start()
+        with self._cond:
+            mark = len(self._lines)
+        with self._write_lock:
+            self.proc.stdin.write(f"{command}\n")
+            self.proc.stdin.flush()
+        return mark
+
+    def expect(
+        self, mark: int, success: str, failure: str, timeout: float = 10
+    ) -> bool:
+        """Wait for an output line after `mark` matching success or failure"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                for line in self._lines[mark:]:
+                    if re.search(success, line):
+                        return True
+                    if re.search(failure, line):
+                        return False
+                mark = len(self._lines)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.proc.poll() is not None:
+                    return False
+                self._cond.wait(remaining)
+
+    def run(
+        self,
+        command: str,
+        success: Optional[str] = None,
+        failure: Optional[str] = None,
+        timeout: float = 10,
+    ) -> bool:
+        """Send a command and wait for its result
+
+        `success` and `failure` default to the command's own patterns.
+        """
+        default_success, default_failure = outcome(command)
+        return self.expect(
+            self.send(command),
+            success or default_success,
+            failure or default_failure,
+            timeout,
+        )
+
+    def run_async(
+        self,
+        command: str,
+        on_done: Callable[[bool], None],
+        success: Optional[str] = None,
+        failure: Optional[str] = None,
+        timeout: float = 30,
+    ) -> threading.Thread:
+        """Run a command in the background and report the result to on_done"""
+
+        def worker():
+            on_done(self.run(command, success, failure, timeout))
+
+        # Not a daemon: a running pair/connect keeps the script alive until done
+        thread = threading.Thread(target=worker)
+        thread.start()
+        return thread
+
+    def close(self):
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        try:
+            self.send("quit")
+            self.proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self.proc.kill()
+
+
+# ─────────────────────────────────────────────
+#  Discovery
+# ─────────────────────────────────────────────
+
+NEW_RE = re.compile(r"\[NEW\] Device (\S+) (.+)$")
+DEL_RE = re.compile(r"\[DEL\] Device (\S+)")
+CHG_RE = re.compile(r"\[CHG\] Device (\S+) (RSSI|Name|Alias): (.+)$")
+RSSI_RE = re.compile(r"(-?\d+)\)?$")
+
+
+@dataclass
+class DiscoveredDevice:
+    mac: str
+    name: Optional[str] = None
+    rssi: Optional[int] = None
+    last_seen: float = 0.0
+
+
+class DiscoveryManager:
+    """Owns a scan on a BluetoothctlSession and indexes what it finds
+
+    Devices are collected by MAC from the session's `[NEW]`/`[CHG]` lines
+    as they arrive, with their RSSI and when they were last seen. Only
+    named ones are listed, since an RSSI `[CHG]` can arrive before a name.
+    The scan is stopped with `scan off` on the same session.
+    """
+
+    def __init__(self, session: BluetoothctlSession):
+        self.session = session
+        self.index: Dict[str, DiscoveredDevice] = {}
+        self.active = False
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+
+    def start(self, timeout: Optional[float] = 30):
+        if self.active:
+            return
+        self.session.listeners.append(self._on_line)
+        self.active = self.session.run("scan on", timeout=5)
+        if not self.active:
+            self.session.listeners.remove(self._on_line)
+            return
+        if timeout:
+            self._timer = threading.Timer(timeout, self.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def stop(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.active:
+            return
+        self.active = False
+        self.session.run("scan off", timeout=5)
+        if self._on_line in self.session.listeners:
+            self.session.listeners.remove(self._on_line)
+
+    def _on_line(self, line: str):
+        now = time.monotonic()
+        with self._lock:
+            if match := NEW_RE.search(line):
+                mac, name = match.groups()
+                device = self.index.setdefault(mac, DiscoveredDevice(mac, name))
+                device.last_seen = now
+            elif match := CHG_RE.search(line):
+                mac, prop, value = match.groups()
+                device = self.index.setdefault(mac, DiscoveredDevice(mac))
+                device.last_seen = now
+                if prop == "RSSI":
+                    # Either "-60" or "0xffffffc4 (-60)" depending on the version
+                    rssi = RSSI_RE.search(value)
+                    device.rssi = int(rssi.group(1)) if rssi else None
+                else:
+                    device.name = value.strip()
+            elif match := DEL_RE.search(line):
+                self.index.pop(match.group(1), None)
+
+    def devices(self) -> List[DiscoveredDevice]:
+        """Discovered devices with a name, strongest signal first"""
+        with self._lock:
+            devices = [d for d in self.index.values() if d.name]
+        return sorted(
+            devices,
+            key=lambda d: (d.rssi is None, -(d.rssi or 0), d.name.lower()),
+        )
@@ -0,0 +1,366 @@
+import json
+import os
+import re
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from libqtile.log_utils import logger
+
+try:
+    from jeepney import DBusAddress, MatchRule, MessageType, new_method_call
+    from jeepney.bus_messages import message_bus
+    from jeepney.io.blocking import open_dbus_connection
+    from jeepney.wrappers import unwrap_msg
+
+    has_jeepney = True
+except ImportError:
+    has_jeepney = False
+
+BLUEZ = "org.bluez"
+# Seconds a snapshot is trusted before BlueZ is asked again
+SNAPSHOT_TTL = 3.0
+
+# object path -> interface -> property -> (signature, value)
+ManagedObjects = Dict[str, Dict[str, Dict[str, Tuple[str, Any]]]]
+
+# ─────────────────────────────────────────────
+#  Model
+# ─────────────────────────────────────────────
+
+
+@dataclass
+class Controller:
+    powered: bool = False
+    discovering: bool = False
+    pairable: bool = False
+    discoverable: bool = False
+
+
+@dataclass
+class Device:
+    mac: str
+    alias: str
+    connected: Optional[bool] = None
+    paired: Optional[bool] = None
+    trusted: Optional[bool] = None
+    battery: Optional[int] = None
+
+    @property
+    def detailed(self) -> bool:
+        """Whether connection/pairing/trust state is known"""
+        return None not in (self.connected, self.paired, self.trusted)
+
+
+# ─────────────────────────────────────────────
+#  bluetoothctl output parsing
+# ─────────────────────────────────────────────
+
+
+def _flag(output: str, name: str) -> bool:
+    return re.search(rf"(?m)^\s*{name}: yes", output) is not None
+
+
+def parse_show(output: str) -> Controller:
+    """Parse `bluetoothctl show`"""
+    return Controller(
+        powered=_flag(output, "Powered"),
+        discovering=_flag(output, "Discovering"),
+        pairable=_flag(output, "Pairable"),
+        discoverable=_flag(output, "Discoverable"),
+    )
+
+
+def parse_devices(output: str) -> Dict[str, Device]:
+    """Parse `bluetoothctl devices` into devices by MAC"""
+    devices = {}
+    for match in re.finditer(r"(?m)^Device (\S+) (.+)$", output):
+        devices[match.group(1)] = Device(match.group(1), match.group(2).strip())
+    return devices
+
+
+def parse_info(mac: str, output: str) -> Device:
+    """Parse `bluetoothctl info <mac>`"""
+    alias = re.search(r"(?m)^\s*Alias: (.+)$", output)
+    battery = re.search(r"(?m)^\s*Battery Percentage: \S+ \((\d+)\)", output)
+    return Device(
+        mac=mac,
+        alias=alias.group(1).strip() if alias else mac,
+        connected=_flag(output, "Connected"),
+        paired=_flag(output, "Paired"),
+        trusted=_flag(output, "Trusted"),
+        battery=int(battery.group(1)) if battery else None,
+    )
+
+
+# ─────────────────────────────────────────────
+#  BlueZ D-Bus API
+# ─────────────────────────────────────────────
+
+
+def get_managed_objects(conn) -> ManagedObjects:
+    """Every adapter and device with all their properties, in one call"""
+    msg = new_method_call(
+        DBusAddress(
+            "/", bus_name=BLUEZ, interface="org.freedesktop.DBus.ObjectManager"
+        ),
+        "GetManagedObjects",
+    )
+    return unwrap_msg(conn.send_and_get_reply(msg, timeout=2))[0]
+
+
+def parse_managed_objects(
+    objects: ManagedObjects, adapter: Optional[str] = None
+) -> Tuple[Controller, Dict[str, Device]]:
+    """Build the controller and its devices from GetManagedObjects output"""
+
+    def props(interfaces, name):
+        return {k: v[1] for k, v in interfaces.get(name, {}).items()}
+
+    adapters = sorted(
+        path for path, ifaces in objects.items() if f"{BLUEZ}.Adapter1" in ifaces
+    )
+    if adapter is None:
+        adapter = adapters[0] if adapters else ""
+    if adapter not in adapters:
+        return Controller(), {}
+
+    info = props(objects[adapter], f"{BLUEZ}.Adapter1")
+    controller = Controller(
+        powered=bool(info.get("Powered")),
+        discovering=bool(info.get("Discovering")),
+        pairable=bool(info.get("Pairable")),
+        discoverable=bool(info.get("Discoverable")),
+    )
+
+    devices = {}
+    for path, interfaces in sorted(objects.items()):
+        device = props(interfaces, f"{BLUEZ}.Device1")
+        if not device or device.get("Adapter") != adapter:
+            continue
+        battery = props(interfaces, f"{BLUEZ}.Battery1").get("Percentage")
+        mac = device.get("Address", "")
+        devices[mac] = Device(
+            mac=mac,
+            alias=device.get("Alias") or device.get("Name") or mac,
+            connected=bool(device.get("Connected")),
+            paired=bool(device.get("Paired")),
+            trusted=bool(device.get("Trusted")),
+            battery=battery,
+        )
+    return controller, devices
+
+
+def _watch_rules() -> List["MatchRule"]:
+    properties = MatchRule(
+        type="signal",
+        sender=BLUEZ,
+        interface="org.freedesktop.DBus.Properties",
+        member="PropertiesChanged",
+        path_namespace="/org/bluez",
+    )
+    # InterfacesAdded / InterfacesRemoved
+    objects = MatchRule(
+        type="signal",
+        sender=BLUEZ,
+        interface="org.freedesktop.DBus.ObjectManager",
+        path="/",
+    )
+    # bluetoothd starting or stopping
+    owner = MatchRule(
+        type="signal",
+        sender="org.freedesktop.DBus",
+        interface="org.freedesktop.DBus",
+        member="NameOwnerChanged",
+        path="/org/freedesktop/DBus",
+    )
+    owner.add_arg_condition(0, BLUEZ)
+    return [properties, objects, owner]
+
+
+def _receive_signal(conn, timeout: Optional[float] = None):
+    msg = conn.receive(timeout=timeout)
+    while msg.header.message_type != MessageType.signal:
+        msg = conn.receive(timeout=timeout)
+    return msg
+
+
+def _wait_quiet(conn, quiet: float, max_delay: float):
+    """Drain signals until none arrives for `quiet` s, or `max_delay` passed"""
+    deadline = time.monotonic() + max_delay
+    while (remaining := deadline - time.monotonic()) > 0:
+        try:
+            _receive_signal(conn, timeout=min(quiet, remaining))
+        except TimeoutError:
+            return
+
+
+def watch_objects(
+    bus: str = "SYSTEM",
+    reconnect_delay: float = 2.0,
+    quiet: float = 0.15,
+    max_delay: float = 1.0,
+) -> Iterator[Optional[ManagedObjects]]:
+    """Yield the managed objects at start and after BlueZ change signals
+
+    Signals are debounced: the objects are fetched again once no signal
+    has arrived for `quiet` seconds, so a burst (a connect changes several
+    properties) costs one call. A steady stream, like RSSI updates during
+    a scan, still refreshes every `max_delay` seconds. Yields None
+    while bluetoothd is not running. If the bus connection drops,
+    reconnects after `reconnect_delay` and starts over.
+    """
+    while True:
+        try:
+            with open_dbus_connection(bus=bus) as conn:
+                for rule in _watch_rules():
+                    conn.send_and_get_reply(message_bus.AddMatch(rule), timeout=2)
+                while True:
+                    try:
+                        yield get_managed_objects(conn)
+                    except Exception:
+                        # org.bluez has no owner, wait for NameOwnerChanged
+                        yield None
+                    _receive_signal(conn)
+                    _wait_quiet(conn, quiet, max_delay)
+        except (OSError, ConnectionError):
+            logger.info("Lost the system bus, reconnecting")
+            yield None
+        time.sleep(reconnect_delay)
+
+
+# ─────────────────────────────────────────────
+#  Snapshot
+# ─────────────────────────────────────────────
+
+
+class BluetoothSnapshot:
+    """Controller and device state shared across one menu interaction
+
+    Each part is queried once and reused until a mutating action calls
+    `invalidate` or it is older than `ttl` seconds (never, if None). When
+    the BlueZ D-Bus API is reachable on `bus` everything comes from a single
+    GetManagedObjects call; otherwise `run`, which takes a bluetoothctl
+    command string and returns its output, is used. It is safe to use from
+    the threads that finish background commands.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[str], str],
+        ttl: Optional[float] = SNAPSHOT_TTL,
+        bus: Optional[str] = "SYSTEM",
+        adapter: Optional[str] = None,
+    ):
+        self.run = run
+        self.ttl = ttl
+        self.bus = bus if has_jeepney else None
+        self.adapter = adapter
+        self._conn = None
+        self._controller: Optional[Controller] = None
+        self._devices: Optional[Dict[str, Device]] = None
+        self._loaded_at = 0.0
+        self._lock = threading.RLock()
+
+    def _fresh(self) -> bool:
+        return self.ttl is None or time.monotonic() - self._loaded_at < self.ttl
+
+    def _load_dbus(self) -> bool:
+        if self.bus is None:
+            return False
+        try:
+            if self._conn is None:
+                self._conn = open_dbus_connection(bus=self.bus)
+            objects = get_managed_objects(self._conn)
+        except Exception:
+            logger.info("BlueZ D-Bus API unavailable, using bluetoothctl")
+            self.bus = None
+            return False
+        self._controller, self._devices = parse_managed_objects(objects, self.adapter)
+        return True
+
+    def _load(self, devices: bool = True):
+        # Callers hold the lock
+        if self._controller is None or not self._fresh():
+            self._loaded_at = time.monotonic()
+            if self._load_dbus():
+                return
+            self._controller = parse_show(self.run("show"))
+            self._devices = None
+        if devices and self._devices is None:
+            self._devices = parse_devices(self.run("devices"))
+
+    @property
+    def controller(self) -> Controller:
+        # Without D-Bus the device list is a separate query, not needed here
+        with self._lock:
+            self._load(devices=False)
+            return self._controller
+
+    @property
+    def devices(self) -> List[Device]:
+        with self._lock:
+            self._load()
+            return list(self._devices.values())
+
+    def device(self, mac: str) -> Device:
+        """Device with full details, fetched with a single `info` query"""
+        with self._lock:
+            self._load()
+            device = self._devices.get(mac)
+            if device is None or not device.detailed:
+                device = parse_info(mac, self.run(f"info {mac}"))
+                self._devices[mac] = device
+            return device
+
+    def invalidate(self):
+        with self._lock:
+            self._controller = None
+            self._devices = None
+
+
+# ─────────────────────────────────────────────
+#  Last known state, for instant menus
+# ─────────────────────────────────────────────
+
+XDG_CACHE_DIR = os.environ.get("XDG_CACHE_HOME", "~/.cache")
+
+
+class DeviceCache:
+    """Last seen device list, persisted between runs
+
+    Only device rows come from here; controller flags are always read live
+    since acting on a stale one (e.g. "Power: on") would flip it the wrong
+    way. Anything that changes the device list calls `invalidate`.
+    """
+
+    def __init__(self, path: str = f"{XDG_CACHE_DIR}/qtile/bluetooth.json"):
+        self.path = os.path.expanduser(path)
+
+    def load(self) -> Optional[List[Device]]:
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return [Device(**device) for device in data["devices"]]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def save(self, devices: List[Device]):
+        data = {"devices": [asdict(device) for device in devices]}
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            logger.warning("Could not write bluetooth cache %s", self.path)
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            logger.warning("Could not remove bluetooth cache %s", self.path)
@@ -1,27 +1,19 @@
-import subprocess
+import operator
+
 from libqtile.lazy import lazy
 
-from scripts.utils import notify
+from utils.backlight import get_backlight
+from utils.executor import get_executor
+from utils.notifications import notify
 
 
 def get_brightness():
     """Return brightness level (0–100)."""
-    result = subprocess.run(
-        ["brightnessctl", "g"], capture_output=True, text=True, check=True
-    )
-    current = int(result.stdout.strip())
-
-    result_max = subprocess.run(
-        ["brightnessctl", "m"], capture_output=True, text=True, check=True
-    )
-    maximum = int(result_max.stdout.strip())
-
-    percent = round((current / maximum) * 100)
-    return percent
+    return get_backlight().get_percent()
 
 
 def send_brightness_notification(brightness):
-    """Show brightness notification via mako/notify-send."""
+    """Show brightness notification via the notification server."""
     icon = "🔅" if brightness < 50 else "🔆"
 
     bar_len = 35
@@ -30,18 +22,36 @@ def send_brightness_notification(brightness):
 
     title = "Screen Brightness"
     message = f"{icon} Brightness: {brightness}%\n{bar}"
-    notify(title, message, replace_id=3_000, app_name="brightness-control")
+    notify(
+        title,
+        message,
+        channel="brightness",
+        expire_time=1_200,
+        app_name="brightness-control",
+    )
+
+
+def _change_percent(step: int) -> int:
+    # On the worker: the first get_backlight() call scans sysfs
+    return get_backlight().change_percent(step)
+
+
+def change_brightness(step):
+    """Queue a relative brightness change; repeated presses are summed"""
+    get_executor().submit(
+        "brightness",
+        _change_percent,
+        step,
+        merge=operator.add,
+        on_done=send_brightness_notification,
+    )
 
 
 @lazy.function
 def increase_brightness(_qtile, amount=5):
-    subprocess.run(["brightnessctl", "set", f"{amount}%+"], check=True)
-    brightness = get_brightness()
-    send_brightness_notification(brightness)
+    change_brightness(amount)
 
 
 @lazy.function
 def decrease_brightness(_qtile, amount=5):
-    subprocess.run(["brightnessctl", "set", f"{amount}%-"], check=True)
-    brightness = get_brightness()
-    send_brightness_notification(brightness)
+    change_brightness(-amount)
@@ -0,0 +1,79 @@
+import heapq
+import itertools
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from libqtile.log_utils import logger
+
+from utils.reload import handover
+
+# Seconds between the first bar draw and the first deferred start, leaving
+# the compositor time to present the frame
+DELAY = 0.05
+
+
+class DeferredStarter:
+    """Starts expensive widgets one per loop iteration after the bars paint
+
+    Deferred widgets enqueue themselves from timer_setup, which qtile calls
+    soon after configuring a bar but before the bar's first draw runs, so
+    the queue is only drained once the static widgets are on screen. Lower
+    priorities start first.
+    """
+
+    def __init__(self, delay: float = DELAY):
+        self.delay = delay
+        self.queue: List[Tuple[float, int, Any, Callable[[], None]]] = []
+        self.started = 0
+        self._order = itertools.count()
+        self._qtile = None
+        self._since: Optional[float] = None
+
+    def add(self, widget, start: Callable[[], None], priority: float):
+        heapq.heappush(self.queue, (priority, next(self._order), widget, start))
+        if self._qtile is None:
+            self._qtile = widget.qtile
+            self._since = time.perf_counter()
+            self._qtile.call_later(self.delay, self._start_next)
+
+    def remove(self, widget):
+        self.queue = [entry for entry in self.queue if entry[2] is not widget]
+        heapq.heapify(self.queue)
+
+    def _start_next(self):
+        if not self.queue:
+            logger.info(
+                "Started %d deferred widgets in %.1f ms",
+                self.started,
+                (time.perf_counter() - self._since) * 1000,
+            )
+            self._qtile = None
+            self.started = 0
+            return
+        _, _, widget, start = heapq.heappop(self.queue)
+        begin = time.perf_counter()
+        try:
+            start()
+        except Exception:
+            logger.exception("Deferred start of %s failed", widget.name)
+        logger.debug(
+            "Deferred start of %s in %.1f ms",
+            widget.name,
+            (time.perf_counter() - begin) * 1000,
+        )
+        self.started += 1
+        # Back to the event loop between widgets so input and redraws are
+        # not held up behind the whole queue
+        self._qtile.call_soon(self._start_next)
+
+
+_starter: Optional[DeferredStarter] = handover(
+    globals().get("_starter"), DeferredStarter
+)
+
+
+def get_deferred_starter() -> DeferredStarter:
+    global _starter
+    if _starter is None:
+        _starter = DeferredStarter()
+    return _starter
@@ -0,0 +1,122 @@
+from typing import Callable, Dict, List, Optional
+
+from libqtile.log_utils import logger
+
+from utils.reload import handover
+from utils.sampler import TickReader, get_sampler, power_supply
+
+NORMAL = "normal"
+SAVER = "saver"
+IDLE = "idle"
+LOCKED = "locked"
+
+
+class EnergyPolicy:
+    """Picks how often the bar samples from power and session state
+
+    Discharging at or below `discharging_below` (a 0-1 charge, so the
+    default 1.0 means any time on battery) stretches every interval by
+    `discharging_stretch`, an idle session by `idle_stretch` and a locked
+    one by `locked_stretch`; a stretch of None suspends sampling. Stretched
+    intervals stop growing at `max_interval` so slow widgets (clock,
+    battery) keep their own pace. Idle and locked are reported from outside,
+    e.g. by swayidle through the EnergyMode widget's commands; discharging
+    is read from the battery on every sampler tick.
+    """
+
+    def __init__(
+        self,
+        battery: str = "BAT0",
+        discharging_below: float = 1.0,
+        discharging_stretch: Optional[float] = 3,
+        idle_stretch: Optional[float] = 10,
+        locked_stretch: Optional[float] = None,
+        max_interval: float = 60,
+    ):
+        self.battery = battery
+        self.discharging_below = discharging_below
+        self.discharging_stretch = discharging_stretch
+        self.idle_stretch = idle_stretch
+        self.locked_stretch = locked_stretch
+        self.max_interval = max_interval
+        self.discharging = False
+        self.idle = False
+        self.locked = False
+        self.mode = NORMAL
+        self.listeners: List[Callable[[str], None]] = []
+
+    def start(self):
+        sampler = get_sampler()
+        if self._on_tick not in sampler.observers:
+            sampler.observers.append(self._on_tick)
+        self._apply()
+
+    def stop(self):
+        sampler = get_sampler()
+        if self._on_tick in sampler.observers:
+            sampler.observers.remove(self._on_tick)
+
+    def configure(self, **thresholds):
+        for name, value in thresholds.items():
+            setattr(self, name, value)
+        self._apply()
+
+    def _on_tick(self, reader: TickReader):
+        props = power_supply(reader, self.battery)
+        discharging = props.get("STATUS") == "Discharging" and (
+            int(props.get("CAPACITY", 0)) / 100 <= self.discharging_below
+        )
+        if discharging != self.discharging:
+            self.discharging = discharging
+            self._apply()
+
+    def set_idle(self, idle: bool):
+        self.idle = idle
+        self._apply()
+
+    def set_locked(self, locked: bool):
+        self.locked = locked
+        self._apply()
+
+    def _apply(self):
+        if self.locked:
+            mode, stretch = LOCKED, self.locked_stretch
+        elif self.idle:
+            mode, stretch = IDLE, self.idle_stretch
+        elif self.discharging:
+            mode, stretch = SAVER, self.discharging_stretch
+        else:
+            mode, stretch = NORMAL, 1
+        get_sampler().set_stretch(stretch, self.max_interval)
+        if mode != self.mode:
+            logger.info("Bar energy mode: %s -> %s", self.mode, mode)
+            self.mode = mode
+            for callback in list(self.listeners):
+                callback(mode)
+
+    def info(self) -> Dict:
+        return {
+            "mode": self.mode,
+            "discharging": self.discharging,
+            "idle": self.idle,
+            "locked": self.locked,
+            "stretch": get_sampler().stretch,
+            "thresholds": {
+                "battery": self.battery,
+                "discharging_below": self.discharging_below,
+                "discharging_stretch": self.discharging_stretch,
+                "idle_stretch": self.idle_stretch,
+                "locked_stretch": self.locked_stretch,
+                "max_interval": self.max_interval,
+            },
+        }
+
+
+_policy: Optional[EnergyPolicy] = handover(globals().get("_policy"), EnergyPolicy)
+
+
+def get_energy_policy() -> EnergyPolicy:
+    global _policy
+    if _policy is None:
+        _policy = EnergyPolicy()
+    return _policy
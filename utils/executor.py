@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+from libqtile.log_utils import logger
+
+from utils.reload import handover
+
+
+@dataclass
+class Job:
+    func: Callable[[Any], Any]
+    arg: Any
+    merge: Optional[Callable[[Any, Any], Any]]
+    on_done: Optional[Callable[[Any], None]]
+    queued_at: float
+    presses: int = 1
+
+
+@dataclass
+class LatencyStats:
+    count: int = 0
+    presses: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    last: float = 0.0
+
+    def record(self, latency: float, presses: int):
+        self.count += 1
+        self.presses += presses
+        self.total += latency
+        self.last = latency
+        self.max = max(self.max, latency)
+
+    def as_dict(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "presses": self.presses,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "last_ms": self.last * 1000,
+        }
+
+
+class HandlerExecutor:
+    """Runs key handler work on a worker thread, off qtile's event loop
+
+    Jobs are keyed by handler name. A job submitted while another with the
+    same name is still queued is merged into it (e.g. ten +5 volume presses
+    become one +50), or without `merge` replaces it, and `on_done` only runs
+    for the last job of a burst so notifications show the final state.
+    """
+
+    def __init__(self):
+        self._pending: "OrderedDict[str, Job]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self.latency: Dict[str, LatencyStats] = {}
+
+    def submit(
+        self,
+        name: str,
+        func: Callable[[Any], Any],
+        arg: Any = None,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        on_done: Optional[Callable[[Any], None]] = None,
+    ):
+        with self._cond:
+            job = self._pending.get(name)
+            if job is not None and merge is not None:
+                job.arg = merge(job.arg, arg)
+                job.presses += 1
+            elif job is not None:
+                # The latest request wins, whatever function it runs
+                job.func, job.arg, job.merge, job.on_done = func, arg, None, on_done
+                job.presses += 1
+            else:
+                self._pending[name] = Job(func, arg, merge, on_done, time.monotonic())
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name="qtile-handlers", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                name, job = self._pending.popitem(last=False)
+
+            try:
+                result = job.func(job.arg)
+            except Exception:
+                logger.exception("Handler %s failed", name)
+                continue
+            finally:
+                latency = time.monotonic() - job.queued_at
+                self.latency.setdefault(name, LatencyStats()).record(
+                    latency, job.presses
+                )
+
+            with self._cond:
+                superseded = name in self._pending
+            if job.on_done is not None and not superseded:
+                try:
+                    job.on_done(result)
+                except Exception:
+                    logger.exception("Completion callback for %s failed", name)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-handler latency from first key press to completed work"""
+        return {name: stats.as_dict() for name, stats in self.latency.items()}
+
+
+_executor: Optional[HandlerExecutor] = handover(
+    globals().get("_executor"), HandlerExecutor
+)
+
+
+def get_executor() -> HandlerExecutor:
+    global _executor
+    if _executor is None:
+        _executor = HandlerExecutor()
+    return _executor
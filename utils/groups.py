@@ -0,0 +1,71 @@
+from typing import Dict, List, Optional
+
+from libqtile import hook
+from libqtile.lazy import lazy
+
+
+class GroupIndex:
+    """Position of each group by name, rebuilt only after groups change"""
+
+    def __init__(self):
+        self.names: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.stale = True
+
+    def invalidate(self, *_):
+        self.stale = True
+
+    def refresh(self, qtile):
+        self.names = [group.name for group in qtile.groups]
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        self.stale = False
+
+    def adjacent(self, qtile, name: str, step: int) -> str:
+        """The group `step` places from `name`, wrapping around the ends"""
+        if self.stale or name not in self.positions:
+            self.refresh(qtile)
+        return self.names[(self.positions[name] + step) % len(self.names)]
+
+
+_index: Optional[GroupIndex] = globals().get("_index")
+
+
+def get_group_index() -> GroupIndex:
+    global _index
+    if _index is None:
+        _index = GroupIndex()
+    return _index
+
+
+# Subscribed again on each reload, after the old subscriptions are dropped
+hook.subscribe.addgroup(get_group_index().invalidate)
+hook.subscribe.delgroup(get_group_index().invalidate)
+hook.subscribe.changegroup(get_group_index().invalidate)
+
+
+@lazy.function
+def move_window_and_follow(qtile, step: int):
+    """Move the focused window `step` groups over and switch to that group
+
+    Done in one pass: the current group is hidden before the window leaves
+    it and the target is off screen when the window joins it, so only the
+    target is laid out, once, when it is shown. With no focused window the
+    screen just moves to that group.
+    """
+    screen = qtile.current_screen
+    current = screen.group
+    target = qtile.groups_map[get_group_index().adjacent(qtile, current.name, step)]
+    if target is current:
+        return
+    window = current.current_window
+    if window is None:
+        screen.set_group(target)
+        return
+    if target.screen is not None:
+        # Shown on another output: both groups stay visible, nothing to save
+        window.togroup(target.name, switch_group=True)
+        return
+    with qtile.core.masked():
+        current.hide()
+        window.togroup(target.name)
+        screen.set_group(target)
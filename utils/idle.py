@@ -0,0 +1,166 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional, Sequence
+
+from libqtile.log_utils import logger
+
+from utils.backlight import get_backlight
+from utils.energy import get_energy_policy
+from utils.executor import get_executor
+from utils.pulse import AudioSnapshot, get_audio_client
+from utils.reload import handover
+
+LOCKER = (
+    "swaylock",
+    "-i",
+    os.path.expanduser("~/.config/qtile/assets/wallpapers/lock_screen.png"),
+)
+SUSPEND = ("systemctl", "suspend")
+
+# What swayidle reports, as the argument of the "idle" user hook
+STAGES = ("dim", "lock", "resume")
+
+
+class IdleManager:
+    """Dims, locks and suspends on swayidle's timeouts, from inside qtile
+
+    swayidle only reports the stages through one command each; the state
+    lives here. The brightness before dimming is kept in memory, playing
+    audio is known from the sound server's event stream, and suspend
+    starts as soon as the locker reports its surface is up (swaylock's
+    --ready-fd) rather than after a fixed delay.
+    """
+
+    def __init__(
+        self,
+        locker: Sequence[str] = LOCKER,
+        suspend: Optional[Sequence[str]] = SUSPEND,
+        dim_percent: int = 10,
+    ):
+        self.locker = list(locker)
+        self.suspend = list(suspend) if suspend else None
+        self.dim_percent = dim_percent
+        self.playing = 0
+        self.saved_brightness: Optional[int] = None
+        self.lock_pending = False
+        self._lock_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        client = get_audio_client()
+        client.remove_listener(self._on_audio_change)
+        client.add_listener(self._on_audio_change)
+        client.start()
+        self.playing = client.snapshot.playing
+
+    def stop(self):
+        get_audio_client().remove_listener(self._on_audio_change)
+
+    def _on_audio_change(self, snapshot: AudioSnapshot):
+        self.playing = snapshot.playing
+        if self.lock_pending and not self.playing:
+            # Still idle when the last stream stopped, so lock now
+            self.lock()
+
+    @property
+    def locked(self) -> bool:
+        return self._lock_task is not None and not self._lock_task.done()
+
+    def dim(self):
+        get_energy_policy().set_idle(True)
+        get_executor().submit("idle-brightness", self._dim)
+
+    def resume(self):
+        self.lock_pending = False
+        get_energy_policy().set_idle(False)
+        # Replaces a dim still queued, which then never saved anything
+        get_executor().submit("idle-brightness", self._restore)
+
+    def _dim(self, _):
+        # On the worker: finding and reading the backlight touches sysfs
+        try:
+            backlight = get_backlight()
+            if self.saved_brightness is None:
+                self.saved_brightness = backlight.get()
+        except OSError:
+            logger.warning("No backlight to dim")
+            return
+        backlight.set_percent(self.dim_percent)
+
+    def _restore(self, _):
+        saved, self.saved_brightness = self.saved_brightness, None
+        if saved is not None:
+            get_backlight().set(saved)
+
+    def lock(self):
+        if self.locked:
+            return
+        if self.playing:
+            logger.info("Not locking: %d audio streams playing", self.playing)
+            self.lock_pending = True
+            return
+        self.lock_pending = False
+        self._lock_task = asyncio.get_running_loop().create_task(self._lock())
+
+    async def _lock(self):
+        policy = get_energy_policy()
+        policy.set_locked(True)
+        start = time.perf_counter()
+        read_fd, write_fd = os.pipe()
+        try:
+            locker = await asyncio.create_subprocess_exec(
+                *self.locker, "--ready-fd", str(write_fd), pass_fds=(write_fd,)
+            )
+        except OSError:
+            logger.exception("Could not start %s", self.locker[0])
+            os.close(read_fd)
+            policy.set_locked(False)
+            return
+        finally:
+            os.close(write_fd)
+
+        # swaylock writes a newline once every output is locked, and the
+        # pipe closes without one if it fails
+        loop = asyncio.get_running_loop()
+        ready = await loop.run_in_executor(None, os.read, read_fd, 1)
+        os.close(read_fd)
+        if ready:
+            logger.info("Locked in %.1f ms", (time.perf_counter() - start) * 1000)
+            if self.suspend:
+                suspend = await asyncio.create_subprocess_exec(*self.suspend)
+                await suspend.wait()
+        else:
+            logger.warning(
+                "%s did not confirm the lock, not suspending", self.locker[0]
+            )
+
+        await locker.wait()
+        policy.set_locked(False)
+
+    def info(self) -> Dict:
+        return {
+            "playing": self.playing,
+            "locked": self.locked,
+            "lock_pending": self.lock_pending,
+            "saved_brightness": self.saved_brightness,
+        }
+
+
+_manager: Optional[IdleManager] = handover(globals().get("_manager"), IdleManager)
+
+
+def get_idle_manager() -> IdleManager:
+    global _manager
+    if _manager is None:
+        _manager = IdleManager()
+    return _manager
+
+
+def handle_idle_stage(stage: str):
+    """Run a swayidle stage, fired as a user hook from outside qtile:
+    `qtile cmd-obj -o cmd -f fire_user_hook -a idle dim`
+    """
+    if stage not in STAGES:
+        logger.warning("Unknown idle stage: %s", stage)
+        return
+    getattr(get_idle_manager(), stage)()
@@ -0,0 +1,97 @@
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from libqtile.images import Img
+
+from utils.assets import prerendered
+
+# Set QTILE_IMAGE_CACHE=0 to decode every image widget separately, e.g. to
+# compare startup time and memory
+ENABLED = os.environ.get("QTILE_IMAGE_CACHE", "1") != "0"
+
+# (path, mtime, target height, target width, scale, rotation)
+ImageKey = Tuple[str, int, Optional[float], Optional[float], bool, float]
+
+
+def surface_bytes(img: Img) -> int:
+    surface = img.surface
+    return surface.get_stride() * surface.get_height()
+
+
+class ImageCache:
+    """Decoded and resized images shared by every CachedImage widget
+
+    Each asset is decoded once per process and size, however many widgets
+    show it. The file's mtime is part of the key, so a config reload reuses
+    every image that did not change and re-decodes the ones that did.
+    """
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.images: Dict[ImageKey, Img] = {}
+        self.hits = 0
+        self.decodes = 0
+        self.decode_time = 0.0
+        self.decoded_bytes = 0
+
+    def get(
+        self,
+        path: str,
+        height: Optional[float] = None,
+        width: Optional[float] = None,
+        scale: bool = True,
+        rotate: float = 0.0,
+    ) -> Img:
+        key = (path, os.stat(path).st_mtime_ns, height, width, scale, rotate)
+        if self.enabled and key in self.images:
+            self.hits += 1
+            return self.images[key]
+
+        start = time.perf_counter()
+        # A PNG pre-rendered by scripts/build_assets.py decodes much faster
+        # than the source SVG, and needs at most a downscale
+        prebuilt = prerendered(path, height) if scale and height else None
+        img = Img.from_path(prebuilt or path)
+        img.theta = rotate
+        if scale and height:
+            img.resize(height=height)
+        elif scale and width:
+            img.resize(width=width)
+        # Rasterize now rather than on first draw, so it happens only once
+        img.pattern
+        self.decode_time += time.perf_counter() - start
+        self.decodes += 1
+        self.decoded_bytes += surface_bytes(img)
+
+        if self.enabled:
+            for stale in [k for k in self.images if k[0] == path and k[1] != key[1]]:
+                del self.images[stale]
+            self.images[key] = img
+        return img
+
+    def clear(self):
+        self.images.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.images),
+            "hits": self.hits,
+            "decodes": self.decodes,
+            "decode_ms": round(self.decode_time * 1000, 2),
+            "decoded_bytes": self.decoded_bytes,
+            "cached_bytes": sum(surface_bytes(img) for img in self.images.values()),
+        }
+
+
+# Config reloads re-run this module in its existing namespace, so
+# module-level singletons are looked up there first to outlive them
+_cache: Optional[ImageCache] = globals().get("_cache")
+
+
+def get_image_cache() -> ImageCache:
+    global _cache
+    if _cache is None:
+        _cache = ImageCache()
+    return _cache
@@ -0,0 +1,164 @@
+import subprocess
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from libqtile.log_utils import logger
+
+try:
+    from jeepney import DBusAddress, new_method_call
+    from jeepney.io.blocking import open_dbus_connection
+    from jeepney.wrappers import unwrap_msg
+
+    has_jeepney = True
+except ImportError:
+    has_jeepney = False
+
+URGENCY = {"low": 0, "normal": 1, "critical": 2}
+
+# Updates on a channel closer together than this are merged, the latest wins
+MIN_INTERVAL = 0.05
+
+
+class Notifier:
+    """Sends notifications over a persistent session bus connection
+
+    Each channel (volume, brightness, mic, bluetooth, ...) remembers the ID
+    the server returned so later updates replace the visible notification
+    instead of stacking. `bus` is passed to jeepney, so it can point at a
+    private dbus-daemon with a stub notification server.
+    """
+
+    def __init__(self, bus: str = "SESSION", min_interval: float = MIN_INTERVAL):
+        self.bus = bus
+        self.min_interval = min_interval
+        self.replace_ids: Dict[str, int] = {}
+        self._conn = None
+        self._lock = threading.RLock()
+        self._last_sent: Dict[str, float] = {}
+        self._pending: Dict[str, Tuple] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+
+    def notify(
+        self,
+        title: str,
+        message: str,
+        channel: Optional[str] = None,
+        urgency: str = "normal",
+        expire_time: int = -1,
+        app_name: str = "qtile",
+    ):
+        args = (title, message, channel, urgency, expire_time, app_name)
+        if channel is None:
+            self._send(*args)
+            return
+
+        with self._lock:
+            wait = (
+                self._last_sent.get(channel, 0) + self.min_interval - time.monotonic()
+            )
+            if wait <= 0 and channel not in self._timers:
+                self._send(*args)
+                return
+            # Too soon after the last update: keep only the newest one and
+            # flush it once the interval has passed
+            self._pending[channel] = args
+            if channel not in self._timers:
+                timer = threading.Timer(max(wait, 0), self._flush, (channel,))
+                timer.daemon = True
+                self._timers[channel] = timer
+                timer.start()
+
+    def _flush(self, channel: str):
+        with self._lock:
+            self._timers.pop(channel, None)
+            args = self._pending.pop(channel, None)
+            if args is not None:
+                self._send(*args)
+
+    def _send(self, title, message, channel, urgency, expire_time, app_name):
+        with self._lock:
+            if channel is not None:
+                self._last_sent[channel] = time.monotonic()
+            replace_id = self.replace_ids.get(channel, 0) if channel else 0
+            new_id = 0
+            if has_jeepney:
+                try:
+                    new_id = self._send_dbus(
+                        title, message, replace_id, urgency, expire_time, app_name
+                    )
+                except Exception:
+                    logger.exception("D-Bus notification failed, using notify-send")
+                    self._conn = None
+            if not new_id:
+                new_id = self._send_fallback(
+                    title, message, replace_id, urgency, expire_time, app_name
+                )
+            if channel is not None and new_id:
+                self.replace_ids[channel] = new_id
+
+    def _send_dbus(self, title, message, replace_id, urgency, expire_time, app_name):
+        if self._conn is None:
+            self._conn = open_dbus_connection(bus=self.bus)
+        msg = new_method_call(
+            DBusAddress(
+                "/org/freedesktop/Notifications",
+                bus_name="org.freedesktop.Notifications",
+                interface="org.freedesktop.Notifications",
+            ),
+            "Notify",
+            "susssasa{sv}i",
+            (
+                app_name,
+                replace_id,
+                "",
+                title,
+                message,
+                [],
+                {"urgency": ("y", URGENCY.get(urgency, 1))},
+                expire_time,
+            ),
+        )
+        reply = self._conn.send_and_get_reply(msg, timeout=2)
+        return unwrap_msg(reply)[0]
+
+    @staticmethod
+    def _send_fallback(title, message, replace_id, urgency, expire_time, app_name):
+        cmd = [
+            "notify-send",
+            "--print-id",
+            f"--urgency={urgency}",
+            f"--expire-time={expire_time}",
+            f"--app-name={app_name}",
+        ]
+        if replace_id:
+            cmd.append(f"--replace-id={replace_id}")
+        try:
+            result = subprocess.run(
+                cmd + [title, message], capture_output=True, text=True, check=False
+            )
+            return int(result.stdout.strip())
+        except (OSError, ValueError):
+            return 0
+
+
+_notifier: Optional[Notifier] = globals().get("_notifier")
+
+
+def get_notifier() -> Notifier:
+    global _notifier
+    if _notifier is None:
+        _notifier = Notifier()
+    return _notifier
+
+
+def notify(
+    title: str,
+    message: str,
+    channel: Optional[str] = None,
+    urgency: str = "normal",
+    expire_time: int = -1,
+    app_name: str = "qtile",
+):
+    """Send a notification, replacing the previous one on the same channel"""
+    get_notifier().notify(title, message, channel, urgency, expire_time, app_name)
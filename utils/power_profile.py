@@ -0,0 +1,141 @@
+import os
+import select
+import threading
+from typing import Callable, Dict, List, Optional
+
+from libqtile.log_utils import logger
+from libqtile.utils import _send_dbus_message, add_signal_receiver
+
+try:
+    from dbus_fast.constants import MessageType
+
+    has_dbus = True
+except ImportError:
+    has_dbus = False
+
+PLATFORM_PROFILE = "/sys/firmware/acpi/platform_profile"
+
+# power-profiles-daemon, which also drives platform_profile when running
+PPD_BUS_NAME = "net.hadess.PowerProfiles"
+PPD_PATH = "/net/hadess/PowerProfiles"
+
+
+def read_profile(path: str) -> Optional[str]:
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def format_profile(profile: Optional[str]) -> str:
+    """e.g. low-power -> Low Power"""
+    if not profile:
+        return "Unknown"
+    return profile.replace("-", " ").title()
+
+
+class PowerProfileSource:
+    """Current platform power profile, pushed to listeners when it changes
+
+    Change events come from sysfs (platform_profile is sysfs_notify'd on
+    every switch) or power-profiles-daemon's PropertiesChanged signal. Only
+    when neither exists, e.g. for a plain file used in tests, is the path
+    re-read every `fallback_interval` seconds. asusd's D-Bus interface is
+    deliberately not followed: asusd mirrors its profile into
+    platform_profile, which the sysfs watch already covers.
+    """
+
+    def __init__(self, path: str = PLATFORM_PROFILE, fallback_interval: float = 60):
+        self.path = path
+        self.fallback_interval = fallback_interval
+        self.profile: Optional[str] = None
+        self.listeners: List[Callable[[Optional[str]], None]] = []
+        self._qtile = None
+
+    def _set(self, profile: Optional[str]):
+        if profile != self.profile:
+            self.profile = profile
+            for callback in list(self.listeners):
+                callback(profile)
+
+    def _refresh(self):
+        self._set(read_profile(self.path))
+
+    async def start(self, qtile):
+        """Start following the profile (idempotent)"""
+        if self._qtile is not None:
+            return
+        self._qtile = qtile
+        self._refresh()
+
+        real = os.path.realpath(self.path)
+        if real.startswith("/sys/") and os.path.exists(real):
+            threading.Thread(target=self._watch_sysfs, daemon=True).start()
+        elif await add_signal_receiver(
+            self._on_ppd_signal,
+            session_bus=False,
+            signal_name="PropertiesChanged",
+            dbus_interface="org.freedesktop.DBus.Properties",
+            bus_name=PPD_BUS_NAME,
+            path=PPD_PATH,
+            check_service=True,
+        ):
+            logger.info("Following power-profiles-daemon for profile changes")
+            if self.profile is None and has_dbus:
+                self._set(await self._read_ppd())
+        else:
+            logger.info("No power profile change events, polling %s", self.path)
+            self._poll()
+
+    def _watch_sysfs(self):
+        with open(self.path) as f:
+            poller = select.poll()
+            # sysfs signals changes with POLLPRI|POLLERR, never POLLIN
+            poller.register(f, select.POLLPRI | select.POLLERR)
+            while True:
+                f.seek(0)
+                profile = f.read().strip()
+                self._qtile.call_soon_threadsafe(self._set, profile)
+                poller.poll()
+
+    async def _read_ppd(self) -> Optional[str]:
+        """ActiveProfile from power-profiles-daemon, for when there is no file"""
+        bus, reply = await _send_dbus_message(
+            False,
+            MessageType.METHOD_CALL,
+            PPD_BUS_NAME,
+            "org.freedesktop.DBus.Properties",
+            PPD_PATH,
+            "Get",
+            "ss",
+            [PPD_BUS_NAME, "ActiveProfile"],
+            preserve=True,
+        )
+        if bus is not None:
+            bus.disconnect()
+        if reply is None or reply.message_type != MessageType.METHOD_RETURN:
+            logger.warning("Could not read the power-profiles-daemon profile")
+            return None
+        return reply.body[0].value
+
+    def _on_ppd_signal(self, message):
+        _, changed, _ = message.body
+        if "ActiveProfile" in changed:
+            self._set(read_profile(self.path) or changed["ActiveProfile"].value)
+
+    def _poll(self):
+        self._refresh()
+        self._qtile.call_later(self.fallback_interval, self._poll)
+
+
+_sources: Dict[str, PowerProfileSource] = globals().get("_sources", {})
+
+
+def get_power_profile_source(
+    path: str = PLATFORM_PROFILE, fallback_interval: float = 60
+) -> PowerProfileSource:
+    """Shared source per path, however many bars show it"""
+    if path not in _sources:
+        _sources[path] = PowerProfileSource(path, fallback_interval)
+    return _sources[path]
@@ -0,0 +1,219 @@
+import functools
+import importlib.abc
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional
+
+from libqtile.log_utils import logger
+
+# Set QTILE_PROFILE=1 to record the startup timeline
+ENABLED = os.environ.get("QTILE_PROFILE", "0") == "1"
+
+XDG_CACHE_DIR = os.environ.get("XDG_CACHE_HOME", "~/.cache")
+REPORT = os.path.expanduser(f"{XDG_CACHE_DIR}/qtile/startup-timeline.json")
+
+CONFIG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def process_age() -> float:
+    """Seconds since this process was launched"""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name; starttime is 22nd
+            started = int(f.read().rsplit(")", 1)[1].split()[19])
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - started / os.sysconf(
+            "SC_CLK_TCK"
+        )
+    except (OSError, ValueError, IndexError):
+        return 0.0
+
+
+@dataclass
+class Span:
+    name: str
+    start: float
+    end: Optional[float] = None
+    depth: int = 0
+
+    @property
+    def duration(self) -> float:
+        return (self.end or self.start) - self.start
+
+
+class Timeline:
+    """Named, nested spans in milliseconds since the process was launched"""
+
+    def __init__(self, enabled: bool = ENABLED):
+        self.enabled = enabled
+        self.origin = time.perf_counter() - process_age()
+        self.spans: List[Span] = []
+        self.finished = False
+        self._open: List[Span] = []
+
+    def now(self) -> float:
+        return (time.perf_counter() - self.origin) * 1000
+
+    def begin(self, name: str) -> Optional[Span]:
+        if not self.enabled or self.finished:
+            return None
+        span = Span(name, self.now(), depth=len(self._open))
+        self.spans.append(span)
+        self._open.append(span)
+        return span
+
+    def end(self, span: Optional[Span]):
+        if span is None:
+            return
+        span.end = self.now()
+        if span in self._open:
+            self._open.remove(span)
+
+    @contextmanager
+    def span(self, name: str):
+        span = self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(span)
+
+    def mark(self, name: str):
+        self.end(self.begin(name))
+
+    def as_dict(self) -> Dict:
+        return {
+            "pid": os.getpid(),
+            "spans": [
+                dict(asdict(span), duration=span.duration) for span in self.spans
+            ],
+        }
+
+    def report(self) -> str:
+        lines = [f"{'start':>9} {'ms':>8}  span"]
+        for span in self.spans:
+            lines.append(
+                f"{span.start:9.1f} {span.duration:8.1f}  {'  ' * span.depth}{span.name}"
+            )
+        return "\n".join(lines)
+
+    def finish(self, path: str = REPORT):
+        """Log the timeline, write it as JSON and stop recording"""
+        if not self.enabled or self.finished:
+            return
+        self.finished = True
+        logger.info("Startup timeline:\n%s", self.report())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(self.as_dict(), f, indent=1)
+        except OSError:
+            logger.warning("Could not write startup timeline %s", path)
+
+
+# ─────────────────────────────────────────────
+#  Instrumentation
+# ─────────────────────────────────────────────
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader, timeline: Timeline):
+        self.loader = loader
+        self.timeline = timeline
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        with self.timeline.span(f"import {module.__name__}"):
+            self.loader.exec_module(module)
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(importlib.abc.MetaPathFinder):
+    """Times the execution of every module from the config directory"""
+
+    def __init__(self, timeline: Timeline, directory: str = CONFIG_DIR):
+        self.timeline = timeline
+        self.directory = directory + os.sep
+
+    def find_spec(self, name, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is None:
+                continue
+            if (spec.origin or "").startswith(self.directory) and not isinstance(
+                spec.loader, _TimedLoader
+            ):
+                spec.loader = _TimedLoader(spec.loader, self.timeline)
+                return spec
+            return None
+        return None
+
+
+def _timed_init(init, timeline: Timeline):
+    @functools.wraps(init)
+    def timed_init(self, *args, **kwargs):
+        if getattr(self, "_init_timed", False):
+            # super().__init__ of a class that is wrapped too
+            return init(self, *args, **kwargs)
+        self._init_timed = True
+        with timeline.span(f"widget {type(self).__name__}"):
+            init(self, *args, **kwargs)
+
+    return timed_init
+
+
+def instrument(timeline: Timeline):
+    """Time config module imports, widget construction and the first bar draw"""
+    from libqtile.bar import Bar
+    from libqtile.widget.base import _Widget
+
+    if any(isinstance(finder, ImportTimer) for finder in sys.meta_path):
+        return
+    sys.meta_path.insert(0, ImportTimer(timeline))
+
+    # Wrap the __init__ of each widget class the first time it is built, so
+    # the span covers the whole constructor and not just the base class part
+    command_new = _Widget.__new__
+
+    def timed_new(cls, *args, **kwargs):
+        if "_timed_init" not in cls.__dict__:
+            cls._timed_init = True
+            cls.__init__ = _timed_init(cls.__init__, timeline)
+        return command_new(cls, *args, **kwargs)
+
+    _Widget.__new__ = staticmethod(timed_new)
+
+    actual_draw = Bar._actual_draw
+
+    def timed_draw(self):
+        if timeline.finished:
+            return actual_draw(self)
+        with timeline.span("first bar draw"):
+            actual_draw(self)
+        timeline.finish()
+
+    Bar._actual_draw = timed_draw
+
+
+_timeline: Optional[Timeline] = globals().get("_timeline")
+
+
+def get_timeline() -> Timeline:
+    global _timeline
+    if _timeline is None:
+        _timeline = Timeline()
+        if _timeline.enabled:
+            instrument(_timeline)
+    return _timeline
+
+
+# Start as early as possible: the config imports this before its own modules
+get_timeline()
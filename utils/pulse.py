@@ -0,0 +1,283 @@
+import asyncio
+import os
+import re
+from dataclasses import dataclass, field, replace
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+from libqtile.log_utils import logger
+
+from utils.reload import handover
+
+# ─────────────────────────────────────────────
+#  Snapshot
+# ─────────────────────────────────────────────
+
+
+@dataclass(frozen=True)
+class AudioDevice:
+    name: str
+    description: str = ""
+    active_port: Optional[str] = None
+    volume: int = 0
+    muted: bool = False
+
+
+@dataclass(frozen=True)
+class AudioSnapshot:
+    sinks: Dict[str, AudioDevice] = field(default_factory=dict)
+    sources: Dict[str, AudioDevice] = field(default_factory=dict)
+    default_sink: Optional[str] = None
+    default_source: Optional[str] = None
+    # Streams currently playing, i.e. uncorked sink inputs
+    playing: int = 0
+
+    @property
+    def sink(self) -> Optional[AudioDevice]:
+        """The current default sink, if known"""
+        return self.sinks.get(self.default_sink or "")
+
+    @property
+    def source(self) -> Optional[AudioDevice]:
+        """The current default source, if known"""
+        return self.sources.get(self.default_source or "")
+
+
+# ─────────────────────────────────────────────
+#  pactl output parsing
+# ─────────────────────────────────────────────
+
+# pactl is always run with LC_ALL=C so these labels are stable
+PACTL_ENV = {**os.environ, "LC_ALL": "C"}
+
+EVENT_RE = re.compile(r"Event '(\w+)' on ([\w-]+) #(-?\d+)")
+
+
+def parse_devices(output: str) -> Dict[str, AudioDevice]:
+    """Parse `pactl list sinks` / `pactl list sources` into devices by name"""
+    devices = {}
+    for block in re.split(r"(?m)^(?:Sink|Source) #\d+\n", output)[1:]:
+        name = re.search(r"(?m)^\s*Name:\s*(\S+)", block)
+        if not name:
+            continue
+        description = re.search(r"(?m)^\s*Description:\s*(.*)$", block)
+        port = re.search(r"(?m)^\s*Active Port:\s*(\S+)", block)
+        volume = re.search(r"(?m)^\s*Volume:.*?/\s*(\d+)%", block)
+        mute = re.search(r"(?m)^\s*Mute:\s*(\w+)", block)
+        devices[name.group(1)] = AudioDevice(
+            name=name.group(1),
+            description=description.group(1).strip() if description else "",
+            active_port=port.group(1) if port else None,
+            volume=int(volume.group(1)) if volume else 0,
+            muted=bool(mute and mute.group(1) == "yes"),
+        )
+    return devices
+
+
+def parse_server_info(output: str) -> Dict[str, Optional[str]]:
+    """Parse the default sink and source out of `pactl info`"""
+    sink = re.search(r"(?m)^Default Sink:\s*(\S+)", output)
+    source = re.search(r"(?m)^Default Source:\s*(\S+)", output)
+    return {
+        "default_sink": sink.group(1) if sink else None,
+        "default_source": source.group(1) if source else None,
+    }
+
+
+def count_playing(output: str) -> int:
+    """Count the uncorked streams in `pactl list sink-inputs`"""
+    return len(re.findall(r"(?m)^\s*Corked:\s*no\b", output))
+
+
+def format_port(port: Optional[str]) -> str:
+    """Prettify a port name, e.g. analog-output-headphones -> Headphones"""
+    if not port:
+        return "Audio: Unknown"
+    return port.replace("analog-output-", "").replace("-", " ").title()
+
+
+def format_volume(sink: Optional[AudioDevice], symbols: List[str]) -> str:
+    """Pick the muted/low/medium/high symbol for a sink, as qtile's Volume does"""
+    if sink is None or sink.muted or sink.volume <= 0:
+        return symbols[0]
+    if sink.volume <= 30:
+        return symbols[1]
+    if sink.volume < 80:
+        return symbols[2]
+    return symbols[3]
+
+
+# Which parts of the snapshot need re-reading for a given event facility
+FACILITY_REFRESH = {
+    "sink": {"sinks"},
+    "source": {"sources"},
+    "server": {"server"},
+    "card": {"sinks", "sources"},
+    "sink-input": {"streams"},
+}
+
+
+# ─────────────────────────────────────────────
+#  Event driven state client
+# ─────────────────────────────────────────────
+
+
+async def run_pactl(*args: str) -> str:
+    """Run a single pactl command without blocking the event loop"""
+    proc = await asyncio.create_subprocess_exec(
+        "pactl",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=PACTL_ENV,
+    )
+    stdout, _ = await proc.communicate()
+    return stdout.decode(errors="replace")
+
+
+async def pactl_subscribe() -> AsyncIterator[str]:
+    """Yield lines from a long lived `pactl subscribe` process"""
+    proc = await asyncio.create_subprocess_exec(
+        "pactl",
+        "subscribe",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=PACTL_ENV,
+    )
+    try:
+        while line := await proc.stdout.readline():
+            yield line.decode(errors="replace")
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+class AudioStateClient:
+    """Keeps an in-memory snapshot of the sound server, refreshed on change events
+
+    `events` returns an async iterator of `pactl subscribe` style lines and
+    `query` runs a pactl command and returns its output; both can be swapped
+    for fakes.
+    """
+
+    def __init__(
+        self,
+        events: Callable[[], AsyncIterator[str]] = pactl_subscribe,
+        query: Callable[..., Awaitable[str]] = run_pactl,
+        debounce: float = 0.05,
+        reconnect_delay: float = 2.0,
+    ):
+        self.events = events
+        self.query = query
+        self.debounce = debounce
+        self.reconnect_delay = reconnect_delay
+        self.snapshot = AudioSnapshot()
+        self._listeners: List[Callable[[AudioSnapshot], None]] = []
+        self._dirty: Set[str] = set()
+        self._refresh_handle: Optional[asyncio.TimerHandle] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def add_listener(self, callback: Callable[[AudioSnapshot], None]):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[AudioSnapshot], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @property
+    def running(self) -> bool:
+        """Whether the snapshot is being kept up to date"""
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Start following the sound server (idempotent)"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def handle_event(self, line: str) -> Set[str]:
+        """Mark the parts of the snapshot an event line invalidates"""
+        match = EVENT_RE.search(line)
+        if not match:
+            return set()
+        kinds = FACILITY_REFRESH.get(match.group(2), set())
+        self._dirty |= kinds
+        return kinds
+
+    async def refresh(self, kinds: Set[str]):
+        """Re-read the given parts of the snapshot and notify on change"""
+        updates = {}
+        if "server" in kinds:
+            updates.update(parse_server_info(await self.query("info")))
+        if "sinks" in kinds:
+            updates["sinks"] = parse_devices(await self.query("list", "sinks"))
+        if "sources" in kinds:
+            updates["sources"] = parse_devices(await self.query("list", "sources"))
+        if "streams" in kinds:
+            updates["playing"] = count_playing(await self.query("list", "sink-inputs"))
+
+        new = replace(self.snapshot, **updates)
+        if new != self.snapshot:
+            self.snapshot = new
+            for callback in list(self._listeners):
+                callback(new)
+
+    def _schedule_refresh(self):
+        if self._refresh_handle is None:
+            loop = asyncio.get_running_loop()
+            self._refresh_handle = loop.call_later(self.debounce, self._flush)
+
+    def _flush(self):
+        self._refresh_handle = None
+        # A running refresh picks up whatever was marked dirty meanwhile
+        if self._dirty and (self._refreshing is None or self._refreshing.done()):
+            loop = asyncio.get_running_loop()
+            self._refreshing = loop.create_task(self._refresh_dirty())
+
+    async def _refresh_dirty(self):
+        """Refresh until nothing is dirty, one refresh at a time
+
+        Otherwise a slow query could let an older refresh finish last and
+        overwrite newer state.
+        """
+        async with self._refresh_lock:
+            while self._dirty:
+                kinds, self._dirty = self._dirty, set()
+                try:
+                    await self.refresh(kinds)
+                except Exception:
+                    logger.exception("Refreshing audio state %s failed", sorted(kinds))
+
+    async def run(self):
+        """Follow the event stream, reconnecting if the server goes away"""
+        while True:
+            try:
+                self._dirty |= {"server", "sinks", "sources", "streams"}
+                await self._refresh_dirty()
+                async for line in self.events():
+                    if self.handle_event(line):
+                        self._schedule_refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Audio event stream failed")
+            await asyncio.sleep(self.reconnect_delay)
+
+
+_client: Optional[AudioStateClient] = handover(
+    globals().get("_client"), AudioStateClient
+)
+
+
+def get_audio_client() -> AudioStateClient:
+    """Shared client so every consumer follows a single event stream"""
+    global _client
+    if _client is None:
+        _client = AudioStateClient()
+    return _client
@@ -0,0 +1,352 @@
+import difflib
+import os
+import sys
+import time
+from types import CodeType
+from typing import Any, Dict, List, Optional, Set, Tuple, Type, TypeVar
+
+from libqtile import hook
+from libqtile.lazy import LazyCall, lazy
+from libqtile.log_utils import logger
+from libqtile.utils import send_notification
+
+SIDES = ("top", "bottom", "left", "right")
+
+T = TypeVar("T")
+
+
+def signature(value: Any) -> Any:
+    """Hashable description of a config value, equal across reloads
+
+    Objects are recreated on every reload, so functions are compared by
+    name, code, defaults and closure contents and configurables by class
+    name and user config.
+    """
+    if isinstance(value, LazyCall):
+        return (
+            "lazy",
+            tuple(value.selectors),
+            value.name,
+            signature(value.args),
+            signature(value.kwargs),
+            signature(value._func),
+            tuple(sorted(value._layouts)),
+            value._when_floating,
+            value._condition,
+            repr(value._focused),
+            value._if_no_focused,
+        )
+    if hasattr(value, "__code__"):
+        return function_signature(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(signature(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, signature(v)) for k, v in value.items()))
+    if hasattr(value, "reflects"):
+        # A Mirror of a widget shared between bars
+        return signature(value.reflects)
+    if hasattr(value, "_user_config"):
+        cls = type(value)
+        return (cls.__module__, cls.__qualname__, signature(value._user_config))
+    return repr(value)
+
+
+def code_signature(code: CodeType) -> Tuple:
+    """Bytecode with the constants and names it uses, nested code included"""
+    return (
+        code.co_code,
+        tuple(
+            code_signature(c) if isinstance(c, CodeType) else repr(c)
+            for c in code.co_consts
+        ),
+        code.co_names,
+    )
+
+
+# Functions being described, so a closure that refers back to its own
+# function does not recurse forever
+_describing: Set[int] = set()
+
+
+def function_signature(func) -> Tuple:
+    if id(func) in _describing:
+        return ("recursive", func.__qualname__)
+    _describing.add(id(func))
+    try:
+        cells = []
+        for cell in getattr(func, "__closure__", None) or ():
+            try:
+                cells.append(signature(cell.cell_contents))
+            except ValueError:
+                # Not assigned yet
+                cells.append(None)
+        return (
+            func.__module__,
+            func.__qualname__,
+            code_signature(func.__code__),
+            signature(getattr(func, "__defaults__", None)),
+            signature(getattr(func, "__kwdefaults__", None)),
+            tuple(cells),
+        )
+    finally:
+        _describing.discard(id(func))
+
+
+# Entries every class body gets, or that only describe its fields
+CLASS_BOOKKEEPING = {
+    "__dict__",
+    "__weakref__",
+    "__doc__",
+    "__module__",
+    "__annotations__",
+    "__dataclass_fields__",
+    "__dataclass_params__",
+}
+
+
+def class_signature(cls: type) -> Tuple:
+    """What a class and its bases from the same module define"""
+    members = []
+    for klass in cls.__mro__:
+        if klass.__module__ != cls.__module__:
+            continue
+        for name, value in vars(klass).items():
+            if name in CLASS_BOOKKEEPING:
+                continue
+            if isinstance(value, property):
+                value = (value.fget, value.fset, value.fdel)
+            elif isinstance(value, (classmethod, staticmethod)):
+                value = value.__func__
+            members.append((klass.__qualname__, name, signature(value)))
+    return tuple(members)
+
+
+def handover(instance: Optional[T], cls: Type[T]) -> Optional[T]:
+    """A running singleton kept across a reload, moved onto the reloaded `cls`
+
+    Reloads re-run the config's modules in their existing namespace, so a
+    singleton looked up there survives, but on the class from before the
+    reload. Only the qtile-side services whose threads, tasks or processes
+    must outlive a reload use this. If `cls` changed, attributes its
+    __init__ now adds are copied from `cls()`, so its constructor must take
+    no arguments and have no side effects. None means build a new one.
+    """
+    if instance is None or type(instance) is cls:
+        return instance
+    old = type(instance)
+    try:
+        instance.__class__ = cls
+    except TypeError:
+        logger.warning("Could not hand %s over, building a new one", cls.__qualname__)
+        return None
+    if class_signature(old) != class_signature(cls):
+        for name, value in vars(cls()).items():
+            vars(instance).setdefault(name, value)
+        logger.info("Moved the running %s onto its edited class", cls.__qualname__)
+    return instance
+
+
+def key_signatures(keys) -> Dict[Tuple, Tuple]:
+    return {
+        (tuple(sorted(key.modifiers)), key.key): (
+            signature(getattr(key, "commands", None)),
+            signature(getattr(key, "submappings", None)),
+            key.desc,
+        )
+        for key in keys
+    }
+
+
+def bar_signature(bar) -> Any:
+    if bar is None:
+        return None
+    return (bar._initial_size, signature(bar._user_config))
+
+
+def snapshot(config) -> Dict[str, Any]:
+    """Signatures of everything an incremental reload knows how to compare"""
+    return {
+        "keys": key_signatures(config.keys),
+        "mouse": signature(config.mouse),
+        "groups": {group.name: signature(vars(group)) for group in config.groups},
+        "layouts": signature(config.layouts),
+        "floating_layout": signature(config.floating_layout),
+        "widget_defaults": signature(config.widget_defaults),
+        "bars": [
+            tuple(bar_signature(getattr(screen, side)) for side in SIDES)
+            for screen in config.screens
+        ],
+    }
+
+
+def config_modules(config) -> set:
+    """Names of the modules reloaded along with the config file"""
+    folder = os.path.dirname(os.path.abspath(config.file_path))
+    return {
+        name
+        for name, module in list(sys.modules.items())
+        if getattr(module, "__file__", None)
+        and os.path.abspath(module.__file__).startswith(folder + os.sep)
+    }
+
+
+def unsubscribe_config_hooks(config) -> List[Tuple[list, Any]]:
+    """Drop hooks subscribed by the config files, which re-subscribe on load"""
+    modules = config_modules(config)
+    removed = []
+    for registry in hook.subscriptions.values():
+        for funcs in registry.values():
+            for func in list(funcs):
+                if getattr(func, "__module__", None) in modules:
+                    funcs.remove(func)
+                    removed.append((funcs, func))
+    return removed
+
+
+# ─────────────────────────────────────────────
+#  Applying the differences
+# ─────────────────────────────────────────────
+
+
+def apply_keys(qtile, old_keys, new_keys) -> int:
+    old, new = key_signatures(old_keys), key_signatures(new_keys)
+    by_spec = {(tuple(sorted(k.modifiers)), k.key): k for k in old_keys}
+    changed = 0
+    for spec, sig in old.items():
+        if new.get(spec) != sig:
+            qtile.ungrab_key(by_spec[spec])
+            changed += 1
+    for key in new_keys:
+        spec = (tuple(sorted(key.modifiers)), key.key)
+        if old.get(spec) != new[spec]:
+            qtile.grab_key(key)
+            changed += 1
+    return changed
+
+
+def apply_mouse(qtile, mouse):
+    qtile.core.ungrab_buttons()
+    qtile._mouse_map.clear()
+    for button in mouse:
+        qtile.grab_button(button)
+
+
+def apply_groups(qtile, old_groups, new_groups) -> int:
+    changed = 0
+    for name in set(old_groups) - set(new_groups):
+        qtile.delete_group(name)
+        changed += 1
+    for group in qtile.config.groups:
+        if group.name not in old_groups:
+            qtile.add_group(group.name, group.layout, label=group.label)
+            changed += 1
+    return changed
+
+
+def apply_bar(qtile, bar, new_bar) -> int:
+    """Keep the widgets whose definition is unchanged, rebuild the others"""
+    old_sigs = [signature(widget) for widget in bar.widgets]
+    new_sigs = [signature(widget) for widget in new_bar.widgets]
+    widgets, added, removed = [], [], []
+    matcher = difflib.SequenceMatcher(a=old_sigs, b=new_sigs, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        if op == "equal":
+            widgets += bar.widgets[i1:i2]
+        else:
+            removed += bar.widgets[i1:i2]
+            added += new_bar.widgets[j1:j2]
+            widgets += new_bar.widgets[j1:j2]
+    if not added and not removed:
+        return 0
+
+    for widget in removed:
+        widget.finalize()
+        for name, registered in list(qtile.widgets_map.items()):
+            if registered is widget:
+                del qtile.widgets_map[name]
+    bar.widgets = widgets
+    for widget in added:
+        if bar._configure_widget(widget):
+            qtile.register_widget(widget)
+        else:
+            bar.widgets.remove(widget)
+    bar._resize(bar._length, bar.widgets)
+    bar.draw()
+    return len(added) + len(removed)
+
+
+# ─────────────────────────────────────────────
+#  Entry point
+# ─────────────────────────────────────────────
+
+
+def full_reload(qtile, start: float, reason: str):
+    logger.info("Full config reload: %s", reason)
+    qtile.reload_config()
+    logger.info("Full config reload in %.1f ms", (time.perf_counter() - start) * 1000)
+
+
+@lazy.function
+def reload_config_incremental(qtile):
+    """Reload the config, applying only what changed to the running session
+
+    Keys, mouse bindings, added or removed groups and bar widgets are
+    updated in place; unchanged widgets keep running with their state.
+    Changes it cannot apply (layouts, screens, bar options, widget
+    defaults) fall back to qtile's full reload.
+    """
+    start = time.perf_counter()
+    config = qtile.config
+    old_keys = config.keys
+    old = snapshot(config)
+
+    removed_hooks = unsubscribe_config_hooks(config)
+    try:
+        config.load()
+        config.validate()
+    except Exception as error:
+        for funcs, func in removed_hooks:
+            funcs.append(func)
+        logger.exception("Configuration error:")
+        send_notification("Configuration error", str(error))
+        return
+
+    new = snapshot(config)
+    kept_groups = {
+        name: sig for name, sig in old["groups"].items() if name in new["groups"]
+    }
+    for name, reason in (
+        ("layouts", "layouts changed"),
+        ("floating_layout", "floating layout changed"),
+        ("widget_defaults", "widget defaults changed"),
+        ("bars", "screens or bar options changed"),
+    ):
+        if old[name] != new[name]:
+            return full_reload(qtile, start, reason)
+    if any(new["groups"][name] != sig for name, sig in kept_groups.items()):
+        return full_reload(qtile, start, "group definitions changed")
+
+    changes = {
+        "keys": apply_keys(qtile, old_keys, config.keys),
+        "groups": apply_groups(qtile, old["groups"], new["groups"]),
+        "widgets": 0,
+    }
+    if old["mouse"] != new["mouse"]:
+        apply_mouse(qtile, config.mouse)
+        changes["mouse"] = len(config.mouse)
+
+    # The running screens and bars stay, so the config must point at them
+    # for later screen reconfiguration
+    for index, screen in enumerate(qtile.screens[: len(config.screens)]):
+        new_screen = config.screens[index]
+        for side in SIDES:
+            bar, new_bar = getattr(screen, side), getattr(new_screen, side)
+            if bar is not None and hasattr(bar, "widgets"):
+                changes["widgets"] += apply_bar(qtile, bar, new_bar)
+        config.screens[index] = screen
+
+    logger.info(
+        "Incremental config reload in %.1f ms, changed: %s",
+        (time.perf_counter() - start) * 1000,
+        changes,
+    )
@@ -0,0 +1,200 @@
+import math
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from libqtile.log_utils import logger
+
+from utils.reload import handover
+
+# A consumer due within this much of a tick is served by it, so timer jitter
+# never splits equal intervals into separate wakeups
+SLACK = 0.05
+
+POWER_SUPPLY = "/sys/class/power_supply"
+
+
+class TickReader:
+    """File contents for one tick, each path is read at most once"""
+
+    def __init__(self):
+        self.time = time.time()
+        self._files: Dict[str, Optional[str]] = {}
+
+    def read(self, path: str) -> Optional[str]:
+        if path not in self._files:
+            try:
+                with open(path) as f:
+                    self._files[path] = f.read()
+            except OSError:
+                self._files[path] = None
+        return self._files[path]
+
+
+# ─────────────────────────────────────────────
+#  /proc and /sys sources
+# ─────────────────────────────────────────────
+
+
+def cpu_times(reader: TickReader) -> Optional[Tuple[int, int]]:
+    """(busy, total) jiffies since boot from /proc/stat"""
+    stat = reader.read("/proc/stat")
+    if not stat:
+        return None
+    # cpu user nice system idle iowait irq softirq steal guest guest_nice
+    fields = [int(value) for value in stat.split("\n", 1)[0].split()[1:9]]
+    idle = fields[3] + fields[4]
+    return sum(fields) - idle, sum(fields)
+
+
+def meminfo(reader: TickReader) -> Dict[str, int]:
+    """/proc/meminfo in bytes"""
+    info = {}
+    for line in (reader.read("/proc/meminfo") or "").splitlines():
+        name, _, value = line.partition(":")
+        parts = value.split()
+        if parts:
+            info[name] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return info
+
+
+def power_supply(reader: TickReader, name: str) -> Dict[str, str]:
+    """Every property of a power supply, from its single uevent file"""
+    props = {}
+    for line in (reader.read(f"{POWER_SUPPLY}/{name}/uevent") or "").splitlines():
+        key, _, value = line.partition("=")
+        props[key.removeprefix("POWER_SUPPLY_")] = value
+    return props
+
+
+# ─────────────────────────────────────────────
+#  Scheduler
+# ─────────────────────────────────────────────
+
+
+class BarSampler:
+    """Drives every polled bar widget from one timer
+
+    A consumer is a widget with an `update_interval` and a
+    `sample(reader) -> bool` method returning whether it redrew. Each is due
+    at wall-clock multiples of its interval, so all consumers with the same
+    or dividing intervals are served by the same wakeup and share one
+    TickReader. The timer sleeps until the earliest due consumer.
+
+    `stretch` multiplies every interval (up to `max_interval`, or a
+    consumer's own interval if longer) and None suspends sampling, see
+    utils.energy. `observers` are called with the reader of every tick.
+    """
+
+    def __init__(self):
+        self.consumers: Dict[object, float] = {}
+        self.observers: List[Callable[[TickReader], None]] = []
+        self.stretch: Optional[float] = 1
+        self.max_interval: float = 60
+        self.wakeups = 0
+        self.redraws = 0
+        self._wakeup_times: Deque[float] = deque()
+        self._redraw_times: Deque[float] = deque()
+        self._qtile = None
+        self._handle = None
+
+    def _next_due(self, consumer, now: float) -> float:
+        interval = consumer.update_interval
+        stretched = min(interval * self.stretch, max(interval, self.max_interval))
+        return (math.floor((now + SLACK) / stretched) + 1) * stretched
+
+    def add(self, consumer):
+        """Sample `consumer` now, then on its aligned ticks"""
+        self._qtile = consumer.qtile
+        reader = TickReader()
+        self._sample(consumer, reader)
+        self.consumers[consumer] = (
+            self._next_due(consumer, reader.time) if self.stretch else math.inf
+        )
+        self._schedule()
+
+    def remove(self, consumer):
+        if self.consumers.pop(consumer, None) is not None:
+            self._schedule()
+
+    def set_stretch(self, stretch: Optional[float], max_interval: float = 60):
+        """Change the interval multiplier, None suspends sampling
+
+        Lowering it, e.g. when the session becomes active again, refreshes
+        every consumer right away.
+        """
+        if stretch == self.stretch and max_interval == self.max_interval:
+            return
+        refresh = self.stretch is None or (
+            stretch is not None and stretch < self.stretch
+        )
+        self.stretch = stretch
+        self.max_interval = max_interval
+        now = time.time()
+        for consumer in self.consumers:
+            if stretch is None:
+                self.consumers[consumer] = math.inf
+            else:
+                self.consumers[consumer] = (
+                    now if refresh else self._next_due(consumer, now)
+                )
+        if self._qtile is not None:
+            self._schedule()
+
+    def _schedule(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if self.consumers and self.stretch:
+            delay = max(min(self.consumers.values()) - time.time(), 0)
+            self._handle = self._qtile.call_later(delay, self._tick)
+
+    def _tick(self):
+        self._handle = None
+        reader = TickReader()
+        self.wakeups += 1
+        self._wakeup_times.append(time.monotonic())
+        for observer in list(self.observers):
+            try:
+                observer(reader)
+            except Exception:
+                logger.exception("Sampler observer failed")
+        for consumer, due in list(self.consumers.items()):
+            if due <= reader.time + SLACK and consumer in self.consumers:
+                self._sample(consumer, reader)
+                self.consumers[consumer] = self._next_due(consumer, reader.time)
+        self._schedule()
+
+    def _sample(self, consumer, reader: TickReader):
+        try:
+            redrew = consumer.sample(reader)
+        except Exception:
+            logger.exception("Sampling %s failed", consumer.name)
+            return
+        if redrew:
+            self.redraws += 1
+            self._redraw_times.append(time.monotonic())
+
+    def stats(self) -> Dict[str, int]:
+        """Totals since start and counts over the last minute"""
+        cutoff = time.monotonic() - 60
+        for times in (self._wakeup_times, self._redraw_times):
+            while times and times[0] < cutoff:
+                times.popleft()
+        return {
+            "consumers": len(self.consumers),
+            "wakeups": self.wakeups,
+            "redraws": self.redraws,
+            "wakeups_per_minute": len(self._wakeup_times),
+            "redraws_per_minute": len(self._redraw_times),
+        }
+
+
+_sampler: Optional[BarSampler] = handover(globals().get("_sampler"), BarSampler)
+
+
+def get_sampler() -> BarSampler:
+    global _sampler
+    if _sampler is None:
+        _sampler = BarSampler()
+    return _sampler
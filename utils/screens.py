@@ -0,0 +1,53 @@
+import time
+from typing import Callable, List
+
+import libqtile
+from libqtile.config import Screen
+from libqtile.log_utils import logger
+
+
+def output_count(qtile) -> int:
+    """Outputs qtile makes screens for, aliasing mirrored ones as it does"""
+    if qtile.core.name is None:
+        # Config loaded before qtile started, e.g. by `qtile check`
+        return 1
+    return len({(info.x, info.y) for info in qtile.core.get_screen_info()}) or 1
+
+
+class OutputScreens:
+    """Keeps a Screen with its own bar for every connected output
+
+    qtile's reconfigure_screens does the attaching and detaching: it uses
+    `config.screens[i]` for output i and finalizes the bars of outputs that
+    went away. Before calling it, `reconfigure` drops those finalized
+    screens from the config and builds new ones from `factory` for outputs
+    that have none, so hotplugging a monitor never needs a restart.
+    """
+
+    def __init__(self, factory: Callable[[int], Screen]):
+        self.factory = factory
+
+    def screens(self) -> List[Screen]:
+        """Initial config.screens, one per output already connected"""
+        return [self.factory(i) for i in range(output_count(libqtile.qtile))]
+
+    def reconfigure(self, qtile):
+        start = time.perf_counter()
+        screens = qtile.config.screens
+        # Finalized bars cannot be configured again
+        for screen in screens[len(qtile.screens) :]:
+            for gap in screen.gaps:
+                for widget in getattr(gap, "widgets", []):
+                    for name, registered in list(qtile.widgets_map.items()):
+                        if registered is widget:
+                            del qtile.widgets_map[name]
+        del screens[len(qtile.screens) :]
+        for index in range(len(screens), output_count(qtile)):
+            screens.append(self.factory(index))
+
+        qtile.reconfigure_screens()
+        logger.info(
+            "Reconfigured %d screen(s) in %.1f ms",
+            len(qtile.screens),
+            (time.perf_counter() - start) * 1000,
+        )
@@ -0,0 +1,209 @@
+import os
+import queue
+import shlex
+import shutil
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Sequence
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+from utils.notifications import notify
+
+SCREENSHOT_DIR = os.path.expanduser("~/Pictures/Screenshots")
+
+# Set QTILE_SCREENSHOT_CAPTURE to a stub that takes grim's arguments and
+# writes a PNG to stdout, to exercise the pipeline without a compositor
+CAPTURE = os.environ.get("QTILE_SCREENSHOT_CAPTURE", "grim")
+SELECT = ("slurp",)
+CLIPBOARD = ("wl-copy", "--type", "image/png")
+RECOMPRESS = ("oxipng", "--quiet", "--opt", "2", "--strip", "safe")
+
+
+def timestamp_file(prefix: str, ext: str, folder) -> str:
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{folder}/{prefix}_{ts}.{ext}"
+
+
+def rect_geometry(x: int, y: int, width: int, height: int) -> str:
+    """A rectangle in grim's -g format"""
+    return f"{x},{y} {width}x{height}"
+
+
+class ScreenshotService:
+    """Captures an output, a window or a selected region off the event loop
+
+    Every capture runs on a thread of its own: presses in quick succession
+    each save a file, and waiting on slurp for a selection holds up neither
+    other captures nor the key handler executor. grim encodes at compression
+    level 0 straight into a pipe. The PNG is copied to the clipboard from
+    memory and saved, and only then is the notification sent. Shrinking the
+    saved file is left to a niced recompressor on its own thread, so it
+    never delays a capture.
+    """
+
+    def __init__(
+        self,
+        capture: str = CAPTURE,
+        select: Sequence[str] = SELECT,
+        clipboard: Sequence[str] = CLIPBOARD,
+        recompress: Sequence[str] = RECOMPRESS,
+        folder: str = SCREENSHOT_DIR,
+    ):
+        self.capture = shlex.split(capture)
+        self.select = list(select)
+        self.clipboard = list(clipboard)
+        self.recompress = list(recompress)
+        self.folder = folder
+        self.captures = 0
+        self.last_capture_ms = 0.0
+        self._pending: "queue.Queue[str]" = queue.Queue()
+        self._compressor: Optional[threading.Thread] = None
+
+    def take(self, geometry: Optional[str] = None, select: bool = False):
+        """Capture `geometry`, the region picked with slurp, or everything"""
+        threading.Thread(
+            target=self._run,
+            args=(geometry, select),
+            name="qtile-screenshot",
+            daemon=True,
+        ).start()
+
+    def _run(self, geometry: Optional[str], select: bool):
+        try:
+            path = self._capture(geometry, select)
+        except Exception:
+            logger.exception("Screenshot failed")
+            return
+        self._done(path)
+
+    def _capture(self, geometry: Optional[str], select: bool) -> Optional[str]:
+        if select:
+            picked = subprocess.run(self.select, capture_output=True, text=True)
+            if picked.returncode != 0:
+                # Selection cancelled with Escape
+                return None
+            geometry = picked.stdout.strip()
+
+        start = time.perf_counter()
+        cmd = self.capture + ["-l", "0"]
+        if geometry:
+            cmd += ["-g", geometry]
+        try:
+            png = subprocess.run(cmd + ["-"], capture_output=True, check=True).stdout
+        except (OSError, subprocess.CalledProcessError) as error:
+            logger.warning("Screenshot capture failed: %s", error)
+            notify("Screenshot Failed", str(error), urgency="critical")
+            return None
+
+        try:
+            subprocess.run(self.clipboard, input=png, check=False)
+        except OSError:
+            logger.warning(
+                "Could not copy the screenshot, %s missing", self.clipboard[0]
+            )
+
+        path = self._save(png)
+        self.captures += 1
+        self.last_capture_ms = (time.perf_counter() - start) * 1000
+        logger.info("Screenshot %s in %.1f ms", path, self.last_capture_ms)
+        return path
+
+    def _save(self, png: bytes) -> str:
+        """Write to a new timestamped file, numbered if that second is taken"""
+        os.makedirs(self.folder, exist_ok=True)
+        base, ext = os.path.splitext(timestamp_file("screenshot", "png", self.folder))
+        path, n = base + ext, 1
+        while True:
+            try:
+                with open(path, "xb") as f:
+                    f.write(png)
+                return path
+            except FileExistsError:
+                path, n = f"{base}_{n}{ext}", n + 1
+
+    def _done(self, path: Optional[str]):
+        if path is None:
+            return
+        notify("Screenshot Taken", path, channel="screenshot", expire_time=1_200)
+        if not self.recompress or shutil.which(self.recompress[0]) is None:
+            return
+        self._pending.put(path)
+        if self._compressor is None or not self._compressor.is_alive():
+            self._compressor = threading.Thread(
+                target=self._recompress_worker, name="qtile-recompress", daemon=True
+            )
+            self._compressor.start()
+
+    def _recompress_worker(self):
+        while True:
+            path = self._pending.get()
+            start = time.perf_counter()
+            before = os.path.getsize(path)
+            result = subprocess.run(
+                ["nice", "-n", "19"] + self.recompress + [path],
+                capture_output=True,
+                check=False,
+            )
+            if result.returncode != 0:
+                logger.warning("Recompressing %s failed: %s", path, result.stderr)
+                continue
+            logger.debug(
+                "Recompressed %s from %d to %d bytes in %.1f ms",
+                path,
+                before,
+                os.path.getsize(path),
+                (time.perf_counter() - start) * 1000,
+            )
+
+
+_service: Optional[ScreenshotService] = globals().get("_service")
+
+
+def get_screenshot_service() -> ScreenshotService:
+    global _service
+    if _service is None:
+        _service = ScreenshotService()
+    return _service
+
+
+# ─────────────────────────────────────────────
+#  Commands
+# ─────────────────────────────────────────────
+
+
+def output_geometry(qtile) -> str:
+    screen = qtile.current_screen
+    return rect_geometry(screen.x, screen.y, screen.width, screen.height)
+
+
+@lazy.function
+def screenshot_all(qtile):
+    """Capture every output, as Print always has"""
+    get_screenshot_service().take()
+
+
+@lazy.function
+def screenshot_output(qtile):
+    """Capture the focused output"""
+    get_screenshot_service().take(output_geometry(qtile))
+
+
+@lazy.function
+def screenshot_window(qtile):
+    """Capture the focused window, or the output when there is none"""
+    window = qtile.current_window
+    if window is None:
+        geometry = output_geometry(qtile)
+    else:
+        geometry = rect_geometry(window.x, window.y, window.width, window.height)
+    get_screenshot_service().take(geometry)
+
+
+@lazy.function
+def screenshot_region(qtile):
+    """Capture a region selected with slurp"""
+    get_screenshot_service().take(select=True)
@@ -0,0 +1,292 @@
+import asyncio
+import os
+import signal
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Union
+
+from libqtile.log_utils import logger
+
+from utils.profiling import Span, Timeline
+from utils.reload import handover
+
+Probe = Callable[[], Awaitable[bool]]
+
+
+@dataclass
+class Service:
+    """A session daemon: its command, what it waits for and when it is up
+
+    `ready` is polled after spawning; without one the service counts as
+    ready once it has stayed up for `grace` seconds.
+    """
+
+    name: str
+    command: Sequence[str]
+    after: Sequence[str] = ()
+    ready: Optional[Probe] = None
+    grace: float = 0.2
+    ready_timeout: float = 10.0
+    restart: bool = True
+
+
+def bus_name(name: str) -> Probe:
+    """Ready once `name` is owned on the session bus"""
+
+    async def probe() -> bool:
+        proc = await asyncio.create_subprocess_exec(
+            "busctl",
+            "--user",
+            "status",
+            name,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        return await proc.wait() == 0
+
+    return probe
+
+
+def find_child(
+    command: Sequence[str], parent: Optional[int] = None, proc: str = "/proc"
+) -> Optional[int]:
+    """PID of a running child of `parent` (this process) started as `command`"""
+    parent = os.getpid() if parent is None else parent
+    wanted = b"".join(arg.encode() + b"\0" for arg in command)
+    for entry in os.scandir(proc):
+        if not entry.name.isdigit():
+            continue
+        try:
+            with open(os.path.join(entry.path, "stat"), "rb") as f:
+                # The name before ")" may hold spaces; state and ppid follow
+                ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+            if ppid != parent:
+                continue
+            with open(os.path.join(entry.path, "cmdline"), "rb") as f:
+                if f.read() == wanted:
+                    return int(entry.name)
+        except (OSError, IndexError, ValueError):
+            continue
+    return None
+
+
+class AdoptedProcess:
+    """A service still running from before a `qtile restart`
+
+    The restart re-executes qtile in the same process, so its services are
+    still children, just without the asyncio Process objects. This stands
+    in for one: its exit is seen through a pidfd.
+    """
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.returncode: Optional[int] = None
+
+    async def wait(self) -> int:
+        if self.returncode is not None:
+            return self.returncode
+        loop = asyncio.get_running_loop()
+        exited = loop.create_future()
+        try:
+            fd = os.pidfd_open(self.pid)
+        except ProcessLookupError:
+            fd = None
+        if fd is not None:
+            loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+            try:
+                await exited
+            finally:
+                loop.remove_reader(fd)
+                os.close(fd)
+        try:
+            result = os.waitid(os.P_PID, self.pid, os.WEXITED | os.WNOHANG)
+        except ChildProcessError:
+            # Already reaped by qtile's SIGCHLD handler, status unknown
+            result = None
+        if result is None:
+            self.returncode = -1
+        elif result.si_code == os.CLD_EXITED:
+            self.returncode = result.si_status
+        else:
+            self.returncode = -result.si_status
+        return self.returncode
+
+    def terminate(self):
+        try:
+            os.kill(self.pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+
+ServiceProcess = Union[asyncio.subprocess.Process, AdoptedProcess]
+
+
+class Supervisor:
+    """Starts session services in dependency order and keeps them running
+
+    Each service waits only for the services in its `after`, so independent
+    ones start in parallel. One that exits is restarted after a delay that
+    doubles on each quick crash, from `backoff` up to `max_backoff`, and
+    resets once it has stayed up for `stable_after` seconds. Services left
+    running by the qtile before a restart are adopted, not started again.
+    """
+
+    def __init__(
+        self,
+        backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        stable_after: float = 30.0,
+        poll_interval: float = 0.05,
+    ):
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+        self.poll_interval = poll_interval
+        self.services: Dict[str, Service] = {}
+        self.processes: Dict[str, ServiceProcess] = {}
+        self.restarts: Dict[str, int] = {}
+        self.timeline = Timeline(enabled=True)
+        self._ready: Dict[str, asyncio.Event] = {}
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self, services: Sequence[Service]):
+        if any(not task.done() for task in self._tasks):
+            logger.info("Session services are already supervised")
+            return
+        for service in services:
+            unknown = set(service.after) - {s.name for s in services}
+            if unknown:
+                raise ValueError(f"{service.name} waits for unknown {unknown}")
+        loop = asyncio.get_running_loop()
+        for service in services:
+            self.services[service.name] = service
+            self._ready[service.name] = asyncio.Event()
+            self.restarts[service.name] = 0
+        self._tasks = [loop.create_task(self._supervise(s)) for s in services]
+        loop.create_task(self._report())
+
+    def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        for proc in self.processes.values():
+            if proc.returncode is None:
+                proc.terminate()
+
+    async def _supervise(self, service: Service):
+        proc = self._adopt(service)
+        if proc is None:
+            for name in service.after:
+                await self._ready[name].wait()
+        delay = self.backoff
+        while True:
+            started = time.monotonic()
+            if proc is None:
+                proc = await self._spawn(service)
+            if proc is not None:
+                code = await proc.wait()
+                if not service.restart:
+                    return
+                logger.warning("%s exited with %s", service.name, code)
+            elif not service.restart:
+                return
+            if time.monotonic() - started > self.stable_after:
+                delay = self.backoff
+            logger.info("Restarting %s in %.0f s", service.name, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_backoff)
+            self.restarts[service.name] += 1
+            proc = None
+
+    def _adopt(self, service: Service) -> Optional[AdoptedProcess]:
+        pid = find_child(service.command)
+        if pid is None:
+            return None
+        logger.info("Adopting %s, still running as pid %d", service.name, pid)
+        now = self.timeline.now()
+        self.timeline.spans.append(Span(f"{service.name} (adopted)", now, now))
+        proc = AdoptedProcess(pid)
+        self.processes[service.name] = proc
+        self._release(service)
+        return proc
+
+    async def _spawn(self, service: Service) -> Optional[asyncio.subprocess.Process]:
+        # Spans are added directly: services start side by side, not nested
+        restarts = self.restarts[service.name]
+        span = Span(
+            f"{service.name} (restart {restarts})" if restarts else service.name,
+            self.timeline.now(),
+        )
+        self.timeline.spans.append(span)
+        try:
+            proc = await asyncio.create_subprocess_exec(*service.command)
+        except OSError as error:
+            logger.warning("Could not start %s: %s", service.name, error)
+            span.end = self.timeline.now()
+            self._release(service)
+            return None
+        self.processes[service.name] = proc
+
+        deadline = time.monotonic() + service.ready_timeout
+        await asyncio.sleep(service.grace if service.ready is None else 0)
+        while proc.returncode is None and service.ready is not None:
+            if await service.ready():
+                break
+            if time.monotonic() > deadline:
+                logger.warning(
+                    "%s not ready after %.0f s", service.name, service.ready_timeout
+                )
+                break
+            await asyncio.sleep(self.poll_interval)
+        span.end = self.timeline.now()
+        self._release(service)
+        return proc
+
+    def _release(self, service: Service):
+        """Let dependants start, even if this service failed or timed out
+
+        A dependency that cannot run should degrade what waits on it (swaybg
+        without kanshi's layout), not keep it from ever starting.
+        """
+        self._ready[service.name].set()
+
+    def _running(self, name: str) -> bool:
+        proc = self.processes.get(name)
+        return proc is not None and proc.returncode is None
+
+    async def _report(self, timeout: float = 30.0):
+        waits = [asyncio.ensure_future(e.wait()) for e in self._ready.values()]
+        _, pending = await asyncio.wait(waits, timeout=timeout)
+        for wait in pending:
+            wait.cancel()
+        not_ready = [
+            name
+            for name, event in self._ready.items()
+            if not event.is_set() or not self._running(name)
+        ]
+        logger.info(
+            "Session services started%s:\n%s",
+            f", not ready: {', '.join(not_ready)}" if not_ready else "",
+            self.timeline.report(),
+        )
+
+    def status(self) -> Dict[str, Dict]:
+        status = {}
+        for name in self.services:
+            proc = self.processes.get(name)
+            status[name] = {
+                "pid": proc.pid if proc else None,
+                "running": self._running(name),
+                "ready": self._ready[name].is_set() and self._running(name),
+                "restarts": self.restarts[name],
+            }
+        return status
+
+
+_supervisor: Optional[Supervisor] = handover(globals().get("_supervisor"), Supervisor)
+
+
+def get_supervisor() -> Supervisor:
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = Supervisor()
+    return _supervisor
@@ -0,0 +1,126 @@
+import time
+from typing import Any, Dict, Optional
+
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+import assets.constants as constants
+from assets.constants import RGBA, ColourEnum
+from utils.reload import SIDES
+
+Recolour = Dict[RGBA, RGBA]
+
+
+def recolour_value(value: Any, mapping: Recolour) -> Optional[Any]:
+    """`value` with palette colours swapped, or None when nothing changed"""
+    if isinstance(value, tuple) and len(value) == 4:
+        return mapping.get(value)
+    if isinstance(value, list) and any(
+        isinstance(v, tuple) and v in mapping for v in value
+    ):
+        return [mapping.get(v, v) if isinstance(v, tuple) else v for v in value]
+    return None
+
+
+def recolour_object(obj: Any, mapping: Recolour) -> bool:
+    """Swap the colours in an object's attributes and user config
+
+    The user config is updated too, so incremental reloads still see the
+    object as unchanged once the config files pick up the new theme.
+    """
+    changed = False
+    for name, value in list(vars(obj).items()):
+        new = recolour_value(value, mapping)
+        if new is not None:
+            setattr(obj, name, new)
+            changed = True
+    config = getattr(obj, "_user_config", None)
+    if isinstance(config, dict):
+        for key, value in config.items():
+            new = recolour_value(value, mapping)
+            if new is not None:
+                config[key] = new
+    return changed
+
+
+def recolour_widget(widget, mapping: Recolour) -> bool:
+    changed = recolour_object(widget, mapping)
+    layout = getattr(widget, "layout", None)
+    colour = getattr(layout, "colour", None)
+    new = recolour_value(colour, mapping)
+    if new is not None:
+        layout.colour = new
+        changed = True
+    return changed
+
+
+def apply_theme(qtile, name: str) -> Dict[str, int]:
+    """Switch palettes, repainting only what uses a colour that changed"""
+    old, new = constants.Colours, ColourEnum.themes[name]
+    mapping = {
+        value: getattr(new, colour)
+        for colour, value in old.colours().items()
+        if getattr(new, colour) != value
+    }
+    constants.ACTIVE_THEME = name
+    constants.Colours = new
+    counts = {"bars": 0, "widgets": 0, "groups": 0}
+    if not mapping:
+        return counts
+
+    for screen in qtile.screens:
+        for side in SIDES:
+            bar = getattr(screen, side)
+            if bar is None or not hasattr(bar, "widgets"):
+                continue
+            bar_changed = recolour_object(bar, mapping)
+            widgets = [w for w in bar.widgets if recolour_widget(w, mapping)]
+            counts["widgets"] += len(widgets)
+            if bar_changed:
+                counts["bars"] += 1
+                bar.draw()
+            else:
+                for widget in widgets:
+                    widget.draw()
+
+    # The config's layouts are what groups clone and reloads compare against
+    for layout in qtile.config.layouts + [qtile.config.floating_layout]:
+        recolour_object(layout, mapping)
+    for group in qtile.groups:
+        layouts = group.layouts + [group.floating_layout]
+        if any([recolour_object(layout, mapping) for layout in layouts]):
+            counts["groups"] += 1
+            if group.screen:
+                # Placing the windows again repaints their borders
+                group.layout_all()
+    return counts
+
+
+def switch_theme(qtile, name: str):
+    if name not in ColourEnum.themes:
+        logger.warning("Unknown theme %s, known: %s", name, list(ColourEnum.themes))
+        return
+    start = time.perf_counter()
+    counts = apply_theme(qtile, name)
+    logger.info(
+        "Theme %s applied in %.1f ms, repainted: %s",
+        name,
+        (time.perf_counter() - start) * 1000,
+        counts,
+    )
+
+
+@lazy.function
+def set_theme(qtile, name: str):
+    """Switch to the registered theme `name`"""
+    switch_theme(qtile, name)
+
+
+@lazy.function
+def cycle_theme(qtile):
+    """Switch to the next registered theme"""
+    names = list(ColourEnum.themes)
+    index = (
+        names.index(constants.ACTIVE_THEME) if constants.ACTIVE_THEME in names else -1
+    )
+    switch_theme(qtile, names[(index + 1) % len(names)])
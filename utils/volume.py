@@ -0,0 +1,173 @@
+import re
+import subprocess
+import threading
+from typing import Optional, Tuple
+
+from libqtile.log_utils import logger
+
+try:
+    import pulsectl
+
+    has_pulsectl = True
+except ImportError:
+    has_pulsectl = False
+
+from utils.pulse import PACTL_ENV, AudioSnapshot, AudioStateClient, get_audio_client
+
+VolumeState = Tuple[int, bool]  # (volume %, is_muted)
+
+
+class PulsectlBackend:
+    """Volume control over one persistent native-protocol connection
+
+    While `follow`ed an AudioStateClient is running, the default sink is
+    kept between calls, so a volume step is a single round trip. Its
+    events drop the cached sink when the default sink changes or is
+    changed by anything else.
+    """
+
+    # Failures are worth retrying through pactl
+    persistent = True
+
+    def __init__(self):
+        self._pulse: Optional["pulsectl.Pulse"] = None
+        self._lock = threading.Lock()
+        self._client: Optional[AudioStateClient] = None
+        self._sink = None
+
+    def follow(self, client: AudioStateClient):
+        self._client = client
+        client.add_listener(self._on_audio_change)
+
+    def _on_audio_change(self, snapshot: AudioSnapshot):
+        sink, current = self._sink, snapshot.sink
+        if sink is None:
+            return
+        # Our own changes come back as events too; those keep the cache
+        if (
+            current is None
+            or current.name != sink.name
+            or current.muted != bool(sink.mute)
+            or abs(current.volume - self._state(sink)[0]) > 1
+        ):
+            self._sink = None
+
+    @property
+    def pulse(self) -> "pulsectl.Pulse":
+        if self._pulse is None or not self._pulse.connected:
+            self._pulse = pulsectl.Pulse("qtile-volume")
+        return self._pulse
+
+    def _call(self, func):
+        """Run func(pulse), reconnecting once if the server went away"""
+        with self._lock:
+            try:
+                return func(self.pulse)
+            except pulsectl.PulseError:
+                self._pulse = self._sink = None
+                return func(self.pulse)
+
+    @staticmethod
+    def _state(device) -> VolumeState:
+        return round(device.volume.value_flat * 100), bool(device.mute)
+
+    def _default_sink(self, pulse):
+        sink = self._sink
+        if sink is None:
+            sink = pulse.get_sink_by_name("@DEFAULT_SINK@")
+            if self._client is not None and self._client.running:
+                self._sink = sink
+        return sink
+
+    def get_volume(self) -> VolumeState:
+        return self._call(
+            lambda pulse: self._state(pulse.get_sink_by_name("@DEFAULT_SINK@"))
+        )
+
+    def get_source_mute(self) -> bool:
+        return self._call(
+            lambda pulse: bool(pulse.get_source_by_name("@DEFAULT_SOURCE@").mute)
+        )
+
+    def change_volume(self, step: int) -> VolumeState:
+        def change(pulse):
+            sink = self._default_sink(pulse)
+            # Clamp at 0%, pulsectl refuses negative volumes
+            delta = max(step / 100, -sink.volume.value_flat)
+            pulse.volume_change_all_chans(sink, delta)
+            # volume_change_all_chans updates sink.volume in place
+            return self._state(sink)
+
+        return self._call(change)
+
+    def toggle_mute(self) -> VolumeState:
+        def toggle(pulse):
+            sink = self._default_sink(pulse)
+            pulse.mute(sink, not sink.mute)
+            sink.mute = not sink.mute
+            return self._state(sink)
+
+        return self._call(toggle)
+
+    def toggle_source_mute(self) -> bool:
+        def toggle(pulse):
+            source = pulse.get_source_by_name("@DEFAULT_SOURCE@")
+            pulse.mute(source, not source.mute)
+            return not source.mute
+
+        return self._call(toggle)
+
+
+class PactlBackend:
+    """Fallback that shells out to pactl for every operation"""
+
+    persistent = False
+
+    @staticmethod
+    def _pactl(*args: str) -> str:
+        result = subprocess.run(
+            ["pactl", *args],
+            capture_output=True,
+            text=True,
+            check=True,
+            env=PACTL_ENV,
+        )
+        return result.stdout
+
+    def get_volume(self) -> VolumeState:
+        volume = self._pactl("get-sink-volume", "@DEFAULT_SINK@")
+        mute = self._pactl("get-sink-mute", "@DEFAULT_SINK@")
+        volume_match = re.search(r"/\s*(\d+)%", volume)
+        return int(volume_match.group(1)) if volume_match else 0, "yes" in mute
+
+    def change_volume(self, step: int) -> VolumeState:
+        self._pactl("set-sink-volume", "@DEFAULT_SINK@", f"{step:+d}%")
+        return self.get_volume()
+
+    def toggle_mute(self) -> VolumeState:
+        self._pactl("set-sink-mute", "@DEFAULT_SINK@", "toggle")
+        return self.get_volume()
+
+    def get_source_mute(self) -> bool:
+        return "yes" in self._pactl("get-source-mute", "@DEFAULT_SOURCE@").lower()
+
+    def toggle_source_mute(self) -> bool:
+        self._pactl("set-source-mute", "@DEFAULT_SOURCE@", "toggle")
+        return self.get_source_mute()
+
+
+_backend = globals().get("_backend")
+
+
+def get_volume_backend():
+    """Persistent connection when pulsectl is installed, pactl otherwise"""
+    global _backend
+    if _backend is None:
+        if has_pulsectl:
+            _backend = PulsectlBackend()
+            _backend.follow(get_audio_client())
+            logger.info("Volume control through pulsectl")
+        else:
+            logger.info("pulsectl is not installed, volume control through pactl")
+            _backend = PactlBackend()
+    return _backend
@@ -0,0 +1,463 @@
+import abc
+import asyncio
+import os
+from typing import Dict, Optional
+
+from libqtile.command.base import expose_command
+from libqtile.widget import base
+from libqtile.log_utils import logger
+from libqtile.widget.battery import BatteryIcon, BatteryState, BatteryStatus
+from libqtile.widget.image import Image
+
+from utils.audio import lower_volume, raise_volume, toggle_mute_audio_output
+from utils.deferred import get_deferred_starter
+from utils.energy import NORMAL, get_energy_policy
+from utils.idle import get_idle_manager
+from utils.images import get_image_cache
+from utils.power_profile import (
+    PLATFORM_PROFILE,
+    format_profile,
+    get_power_profile_source,
+)
+from utils.pulse import AudioSnapshot, format_port, format_volume, get_audio_client
+from utils.sampler import TickReader, cpu_times, get_sampler, meminfo, power_supply
+
+
+class AudioOutputDevice(base._TextBox):
+    """Shows the active port of the default sink, updated on sound server events"""
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+
+    async def _config_async(self):
+        client = get_audio_client()
+        client.add_listener(self._on_audio_change)
+        client.start()
+        self._on_audio_change(client.snapshot)
+
+    def _on_audio_change(self, snapshot: AudioSnapshot):
+        sink = snapshot.sink
+        self.update(format_port(sink.active_port if sink else None))
+
+    def finalize(self):
+        get_audio_client().remove_listener(self._on_audio_change)
+        base._TextBox.finalize(self)
+
+
+class AudioVolume(base._TextBox):
+    """Shows the default sink's volume as an emoji, updated on sound server events"""
+
+    defaults = [
+        (
+            "emoji_list",
+            ["\U0001f507", "\U0001f508", "\U0001f509", "\U0001f50a"],
+            "Muted, low, medium and high volume symbols",
+        ),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(AudioVolume.defaults)
+        self.add_callbacks(
+            {
+                "Button1": toggle_mute_audio_output,
+                "Button4": raise_volume,
+                "Button5": lower_volume,
+            }
+        )
+
+    async def _config_async(self):
+        client = get_audio_client()
+        client.add_listener(self._on_audio_change)
+        client.start()
+        self._on_audio_change(client.snapshot)
+
+    def _on_audio_change(self, snapshot: AudioSnapshot):
+        sink = snapshot.sink
+        self.update(format_volume(sink, self.emoji_list))
+
+    def finalize(self):
+        get_audio_client().remove_listener(self._on_audio_change)
+        base._TextBox.finalize(self)
+
+
+class PowerProfile(base._TextBox):
+    """Shows the platform power profile, updated when it changes"""
+
+    defaults = [
+        ("path", PLATFORM_PROFILE, "File holding the active profile name"),
+        (
+            "fallback_interval",
+            60,
+            "Seconds between re-reads when no change events are available",
+        ),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(PowerProfile.defaults)
+
+    async def _config_async(self):
+        source = get_power_profile_source(self.path, self.fallback_interval)
+        source.listeners.append(self._on_profile_change)
+        await source.start(self.qtile)
+        self._on_profile_change(source.profile)
+
+    def _on_profile_change(self, profile: Optional[str]):
+        self.update(format_profile(profile))
+
+    def finalize(self):
+        source = get_power_profile_source(self.path)
+        if self._on_profile_change in source.listeners:
+            source.listeners.remove(self._on_profile_change)
+        base._TextBox.finalize(self)
+
+
+# ─────────────────────────────────────────────
+#  Sampled widgets
+# ─────────────────────────────────────────────
+
+
+class _Sampled:
+    """Hands a widget's polling to the shared BarSampler instead of a timer"""
+
+    def timer_setup(self):
+        get_sampler().add(self)
+
+    def sample(self, reader: TickReader) -> bool:
+        """Refresh for this tick, returns whether the widget redrew"""
+        old = self.text
+        self.update(self.poll())
+        return self.text != old
+
+    def finalize(self):
+        get_sampler().remove(self)
+        super().finalize()
+
+    @expose_command()
+    def sampler_stats(self) -> Dict[str, int]:
+        """Wakeups and redraws of the shared bar sampler"""
+        return get_sampler().stats()
+
+
+def sampled(cls):
+    """`cls` with its poll() driven by the sampler, e.g. sampled(widget.Clock)"""
+    return type(cls.__name__, (_Sampled, cls), {})
+
+
+class SampledText(_Sampled, base._TextBox):
+    """Text formatted from the values() read on each sampler tick
+
+    Abstract: qtile widgets are ABCs, so a subclass without values() fails
+    when the config builds it rather than on its first tick.
+    """
+
+    defaults = [
+        ("format", "{}", "Format string for the sampled values"),
+        ("update_interval", 1.0, "Seconds between samples"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(SampledText.defaults)
+
+    @abc.abstractmethod
+    def values(self, reader: TickReader) -> Optional[Dict]:
+        """Values for `format`, or None when they cannot be read"""
+
+    def sample(self, reader: TickReader) -> bool:
+        values = self.values(reader)
+        old = self.text
+        self.update(self.format.format(**values) if values else "N/A")
+        return self.text != old
+
+
+class CPULoad(SampledText):
+    """Total CPU load since the previous sample, from /proc/stat"""
+
+    defaults = [("format", "{load_percent}%", "Format string")]
+
+    def __init__(self, **config):
+        SampledText.__init__(self, **config)
+        self.add_defaults(CPULoad.defaults)
+        self._last = (0, 0)
+
+    def values(self, reader: TickReader) -> Optional[Dict]:
+        times = cpu_times(reader)
+        if times is None:
+            return None
+        busy, total = (now - last for now, last in zip(times, self._last))
+        self._last = times
+        return {"load_percent": round(100 * busy / total, 1) if total else 0.0}
+
+
+class MemoryUsage(SampledText):
+    """Memory use from /proc/meminfo, with the fields of widget.Memory"""
+
+    measures = {"G": 1024**3, "M": 1024**2, "K": 1024, "B": 1}
+
+    defaults = [
+        ("format", "{MemUsed: .0f}{mm}", "Format string"),
+        ("measure_mem", "M", "Unit for memory values: G, M, K or B"),
+    ]
+
+    def __init__(self, **config):
+        SampledText.__init__(self, **config)
+        self.add_defaults(MemoryUsage.defaults)
+
+    def values(self, reader: TickReader) -> Optional[Dict]:
+        info = meminfo(reader)
+        if "MemTotal" not in info:
+            return None
+        unit = self.measures[self.measure_mem]
+        total, free = info["MemTotal"], info["MemFree"]
+        available = info.get("MemAvailable", free)
+        cached = info.get("Cached", 0) + info.get("SReclaimable", 0)
+        used = total - free - info.get("Buffers", 0) - cached
+        return {
+            "MemUsed": (used if used >= 0 else total - free) / unit,
+            "MemTotal": total / unit,
+            "MemFree": free / unit,
+            "Available": available / unit,
+            "MemPercent": round(100 * (total - available) / total, 1),
+            "mm": self.measure_mem,
+        }
+
+
+STATES = {
+    "Charging": BatteryState.CHARGING,
+    "Discharging": BatteryState.DISCHARGING,
+    "Full": BatteryState.FULL,
+    "Not charging": BatteryState.NOT_CHARGING,
+}
+
+
+def battery_status(reader: TickReader, battery: str) -> Optional[BatteryStatus]:
+    props = power_supply(reader, battery)
+    if "CAPACITY" not in props:
+        return None
+    state = STATES.get(props.get("STATUS", ""), BatteryState.UNKNOWN)
+    return BatteryStatus(state, int(props["CAPACITY"]) / 100, 0.0, 0, 0, 100)
+
+
+class BatteryLevel(SampledText):
+    """Battery charge from sysfs, coloured when low and discharging"""
+
+    defaults = [
+        ("battery", "BAT0", "Power supply name under /sys/class/power_supply"),
+        ("format", "{percent:2.0%}", "Format string"),
+        ("low_percentage", 0.2, "Charge below which low_foreground is used"),
+        ("low_foreground", "FF0000", "Font colour on low battery"),
+        ("update_interval", 60, "Seconds between samples"),
+    ]
+
+    def __init__(self, **config):
+        SampledText.__init__(self, **config)
+        self.add_defaults(BatteryLevel.defaults)
+
+    def values(self, reader: TickReader) -> Optional[Dict]:
+        status = battery_status(reader, self.battery)
+        if status is None:
+            return None
+        return {"percent": status.percent, "state": status.state}
+
+    def sample(self, reader: TickReader) -> bool:
+        status = battery_status(reader, self.battery)
+        low = (
+            status is not None
+            and status.state == BatteryState.DISCHARGING
+            and status.percent < self.low_percentage
+        )
+        colour = self.low_foreground if low else self.foreground
+        recoloured = self.layout.colour != colour
+        self.layout.colour = colour
+        redrew = SampledText.sample(self, reader)
+        if recoloured and not redrew:
+            self.draw()
+        return redrew or recoloured
+
+
+class BatteryLevelIcon(_Sampled, BatteryIcon):
+    """widget.BatteryIcon reading its status through the sampler"""
+
+    def setup_images(self):
+        theme = os.path.expanduser(self.theme_path)
+        paths = [os.path.join(theme, f"{name}.png") for name in self.icon_names]
+        if not all(os.path.exists(path) for path in paths):
+            BatteryIcon.setup_images(self)
+            return
+        height = self.bar.height * self.scale
+        for name, path in zip(self.icon_names, paths):
+            self.images[name] = get_image_cache().get(path, height)
+
+    def sample(self, reader: TickReader) -> bool:
+        status = battery_status(reader, self.battery)
+        if status is None:
+            return False
+        icon = self._get_icon_key(status)
+        if icon == self.current_icon:
+            return False
+        self.current_icon = icon
+        self.draw()
+        return True
+
+
+# ─────────────────────────────────────────────
+#  Deferred widgets
+# ─────────────────────────────────────────────
+
+
+class _Deferred:
+    """Postpones a widget's timers and async setup until after the first frame
+
+    Until its turn comes a text widget shows `placeholder`, so the bar can
+    be laid out and painted without waiting on D-Bus, subprocesses or sysfs.
+    """
+
+    defaults = [
+        (
+            "priority",
+            None,
+            "Start order after the first frame, lower first; "
+            "None uses the widget's position in its bar",
+        ),
+        ("placeholder", "…", "Text shown until the widget has started"),
+    ]
+
+    def __init__(self, *args, **config):
+        super().__init__(*args, **config)
+        self.add_defaults(_Deferred.defaults)
+        self._deferred_ready = asyncio.Event()
+
+    def _configure(self, qtile, bar):
+        if not self.configured and hasattr(self, "text"):
+            self.text = self.placeholder
+        super()._configure(qtile, bar)
+
+    def timer_setup(self):
+        priority = self.priority
+        if priority is None:
+            priority = self.bar.widgets.index(self)
+        get_deferred_starter().add(self, self._deferred_start, priority)
+
+    def _deferred_start(self):
+        super().timer_setup()
+        self._deferred_ready.set()
+
+    async def _config_async(self):
+        await self._deferred_ready.wait()
+        await super()._config_async()
+
+    def finalize(self):
+        get_deferred_starter().remove(self)
+        super().finalize()
+
+
+def deferred(cls):
+    """`cls` started after the first frame, e.g. deferred(widget.Bluetooth)"""
+    return type(cls.__name__, (_Deferred, cls), {})
+
+
+class EnergyMode(base._TextBox):
+    """Shows and controls the bar's energy mode, hidden while it is normal
+
+    The thresholds configure the shared EnergyPolicy and the widget starts
+    the IdleManager, which swayidle reaches through the "idle" user hook
+    (see utils/idle.py), whatever the bar looks like.
+    """
+
+    defaults = [
+        ("format", "{mode}", "Format string for a non-normal mode"),
+        ("battery", "BAT0", "Battery checked for discharging"),
+        (
+            "discharging_below",
+            1.0,
+            "Charge at or below which discharging stretches polling, 1.0 is always",
+        ),
+        ("discharging_stretch", 3, "Interval multiplier on battery"),
+        ("idle_stretch", 10, "Interval multiplier while idle, None suspends"),
+        ("locked_stretch", None, "Interval multiplier while locked, None suspends"),
+        ("max_interval", 60, "Stretched intervals stop growing here"),
+    ]
+
+    def __init__(self, **config):
+        base._TextBox.__init__(self, "", **config)
+        self.add_defaults(EnergyMode.defaults)
+
+    def timer_setup(self):
+        policy = get_energy_policy()
+        policy.listeners.append(self._on_mode_change)
+        policy.configure(
+            battery=self.battery,
+            discharging_below=self.discharging_below,
+            discharging_stretch=self.discharging_stretch,
+            idle_stretch=self.idle_stretch,
+            locked_stretch=self.locked_stretch,
+            max_interval=self.max_interval,
+        )
+        policy.start()
+        get_idle_manager().start()
+        self._on_mode_change(policy.mode)
+
+    def _on_mode_change(self, mode: str):
+        self.update("" if mode == NORMAL else self.format.format(mode=mode))
+
+    def finalize(self):
+        policy = get_energy_policy()
+        if self._on_mode_change in policy.listeners:
+            policy.listeners.remove(self._on_mode_change)
+        if not policy.listeners:
+            policy.stop()
+            get_idle_manager().stop()
+        base._TextBox.finalize(self)
+
+    @expose_command()
+    def set_idle(self, idle: bool = True):
+        """Stretch polling while the session is idle"""
+        get_energy_policy().set_idle(idle)
+
+    @expose_command()
+    def set_locked(self, locked: bool = True):
+        """Stretch or suspend polling while the session is locked"""
+        get_energy_policy().set_locked(locked)
+
+    @expose_command()
+    def idle_info(self) -> Dict:
+        """Playing streams, lock state and the brightness to restore"""
+        return get_idle_manager().info()
+
+    @expose_command()
+    def energy_info(self) -> Dict:
+        """Current mode, its inputs and the policy thresholds"""
+        return get_energy_policy().info()
+
+
+class CachedImage(Image):
+    """widget.Image drawing from the shared image cache"""
+
+    def _update_image(self):
+        self.img = None
+
+        if not self.filename:
+            logger.warning("Image filename not set!")
+            return
+
+        self.filename = os.path.expanduser(self.filename)
+
+        if not os.path.exists(self.filename):
+            logger.warning("Image does not exist: %s", self.filename)
+            return
+
+        height = width = None
+        if self.scale and self.bar.horizontal:
+            height = self.bar.height - (self.margin_y * 2)
+        elif self.scale:
+            width = self.bar.width - (self.margin_x * 2)
+        self.img = get_image_cache().get(
+            self.filename, height, width, self.scale, self.rotate
+        )
+
+    @expose_command()
+    def image_cache_stats(self) -> Dict:
+        """Decodes, hits, decode time and surface memory of the image cache"""
+        return get_image_cache().stats()